@@ -0,0 +1,122 @@
+"""
+Background analysis for the UI: a worker process searches the position on
+screen and streams every completed depth back through a queue, so the
+window never waits on the engine.
+
+Each submitted position gets a new generation number in shared memory.
+The worker polls it during the search and drops the position as soon as
+a newer one is submitted, and results of older generations are ignored.
+"""
+import multiprocessing as mp
+import os
+import queue
+from collections import namedtuple
+
+from search import Engine
+
+Analysis = namedtuple("Analysis", "depth score pv nodes elapsed")
+
+
+def _worker(requests, results, generation, time_limit):
+    # leave the CPU to the UI when they compete for it
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+    engine = Engine()
+    parent = mp.parent_process()
+    while True:
+        try:
+            request = requests.get(timeout=1.0)
+        except queue.Empty:
+            # the UI may have been killed without closing us
+            if not parent.is_alive():
+                return
+            continue
+        # only the newest position matters
+        while True:
+            try:
+                request = requests.get_nowait()
+            except queue.Empty:
+                break
+        if request is None:
+            return
+
+        gen, white, black, side = request
+        if gen != generation.value:
+            continue
+
+        def report(result):
+            # scores from white's point of view, like the material counts
+            results.put((gen, Analysis(result.depth, result.score * side, result.pv,
+                                       result.nodes, result.elapsed)))
+
+        engine.search(
+            white, black, side,
+            time_limit=time_limit,
+            on_iteration=report,
+            stop=lambda: generation.value != gen,
+        )
+
+
+class Analyzer:
+    """
+    Analyze positions in a worker process. submit() the displayed position
+    every frame, it is only sent on when it changes, and poll() for the
+    deepest analysis of it so far.
+    """
+
+    def __init__(self, time_limit=60.0):
+        # spawn, so the worker does not inherit the display from a fork
+        ctx = mp.get_context("spawn")
+        self.generation = ctx.RawValue("q", 0)
+        self.requests = ctx.Queue()
+        self.results = ctx.Queue()
+        self.process = ctx.Process(
+            target=_worker,
+            args=(self.requests, self.results, self.generation, time_limit),
+            daemon=True,
+        )
+        self.process.start()
+        self.position = None
+        self.latest = None
+        self.updates = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, white, black, side):
+        position = (white, black, side)
+        if position == self.position:
+            return
+        self.position = position
+        self.latest = None
+        # bumping the generation cancels whatever the worker is searching
+        self.generation.value += 1
+        self.requests.put((self.generation.value, white, black, side))
+
+    def submit_board(self, board):
+        self.submit(board.bits.white, board.bits.black, board.turn)
+
+    def poll(self):
+        while True:
+            try:
+                gen, analysis = self.results.get_nowait()
+            except queue.Empty:
+                return self.latest
+            if gen == self.generation.value:
+                self.latest = analysis
+                self.updates += 1
+
+    def close(self):
+        if self.process is None:
+            return
+        self.generation.value += 1
+        self.requests.put(None)
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process = None
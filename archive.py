@@ -0,0 +1,199 @@
+"""
+Compact binary game archive with random access through mmap.
+
+Layout, all integers little endian:
+
+    file header   magic b"BTGA", version u16, reserved u16,
+                  game count u64, index offset u64            (24 bytes)
+    games         per game: ply count u16, winner i8, reserved u8,
+                  then one byte per move                      (4 + plies)
+    index         u64 file offset of every game
+
+A move byte is the from square (y * 8 + x) in the low 6 bits and the
+direction in the top 2: 0 forward, 1 towards file a, 2 towards file h.
+White moves on even plies and black on odd ones, so captures and the
+destination square follow from replaying the moves.
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from bitboard import square, coords
+from board import Board
+from notation import parse_move, split_game, format_move
+from replay import replay_game
+
+MAGIC = b"BTGA"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sHHQQ")
+GAME_HEADER = struct.Struct("<Hbx")
+
+FORWARD, LEFT, RIGHT = 0, 1, 2
+# to_sq - from_sq by direction, for white and black
+WHITE_STEPS = (-8, -9, -7)
+BLACK_STEPS = (8, 7, 9)
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def encode_move(f, t):
+    (x1, y1), (x2, y2) = f, t
+    direction = FORWARD if x1 == x2 else LEFT if x2 < x1 else RIGHT
+    return square(x1, y1) | (direction << 6)
+
+
+def decode_move(byte, ply):
+    # (from_sq, to_sq) of a move byte played at ply
+    fr = byte & 63
+    steps = WHITE_STEPS if ply % 2 == 0 else BLACK_STEPS
+    return fr, fr + steps[byte >> 6]
+
+
+class ArchiveWriter:
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.offsets = array("Q")
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_game(self, moves, winner=0):
+        """Append a game given as a list of (from, to) grid coordinates."""
+        self.add_move_bytes(bytes(encode_move(f, t) for f, t in moves), winner)
+
+    def add_move_bytes(self, move_bytes, winner=0):
+        # append a game already encoded as move bytes, without checking it
+        self.offsets.append(self.file.tell())
+        self.file.write(GAME_HEADER.pack(len(move_bytes), winner))
+        self.file.write(move_bytes)
+
+    def add_game_string(self, game_str):
+        """
+        Append a game in 'a2-a3;...' notation after checking it against the
+        rules. Returns False, writing nothing, if the game is invalid.
+        """
+        result = replay_game(game_str)
+        if result.illegal_ply is not None:
+            return False
+        self.add_game([parse_move(m) for m in split_game(game_str)], result.winner)
+        return True
+
+    def close(self):
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        self.file.write(self.offsets.tobytes())
+        self.file.seek(0)
+        self.file.write(
+            FILE_HEADER.pack(MAGIC, VERSION, 0, len(self.offsets), index_offset)
+        )
+        self.file.close()
+
+
+class ArchiveReader:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, count, index_offset = FILE_HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise ArchiveError(f"{path} is not a game archive")
+        if version != VERSION:
+            raise ArchiveError(f"unsupported archive version {version}")
+        self.count = count
+        self.index = memoryview(self.mm)[index_offset:index_offset + 8 * count].cast("Q")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.mm.closed:
+            return
+        self.index.release()
+        self.mm.close()
+        self.file.close()
+
+    def __len__(self):
+        return self.count
+
+    def header(self, k):
+        # (ply count, winner) of game k
+        return GAME_HEADER.unpack_from(self.mm, self.index[k])
+
+    def move_bytes(self, k):
+        offset = self.index[k] + GAME_HEADER.size
+        plies, _ = self.header(k)
+        return self.mm[offset:offset + plies]
+
+    def moves(self, k):
+        # (from, to) grid coordinates of every move in game k
+        return [
+            (coords(fr), coords(to))
+            for fr, to in (decode_move(b, ply) for ply, b in enumerate(self.move_bytes(k)))
+        ]
+
+    def move(self, k, n):
+        # the move played at ply n of game k, read without touching the rest
+        plies, _ = self.header(k)
+        if not 0 <= n < plies:
+            raise IndexError(f"game {k} has no ply {n}")
+        fr, to = decode_move(self.mm[self.index[k] + GAME_HEADER.size + n], n)
+        return coords(fr), coords(to)
+
+    def board(self, k, plies=None):
+        """Board for game k with its history, positioned after plies moves."""
+        board = Board()
+        for f, t in self.moves(k):
+            board.move(f, t)
+        if plies is not None:
+            board.seek(plies)
+        return board
+
+    def boards(self):
+        # lazily replay every game
+        for k in range(self.count):
+            yield self.board(k)
+
+    def game_string(self, k):
+        board = Board()
+        moves = []
+        for f, t in self.moves(k):
+            capture = board.bits.piece_at(*t) != 0
+            board.move(f, t)
+            moves.append(format_move(f, t, capture))
+        return ";".join(moves)
+
+
+def convert(lines, path):
+    """
+    Write every valid game string in lines to an archive at path.
+    Returns (games written, games skipped as invalid).
+    """
+    written = skipped = 0
+    with ArchiveWriter(path) as writer:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if writer.add_game_string(line):
+                written += 1
+            else:
+                skipped += 1
+    return written, skipped
+
+
+if __name__ == "__main__":
+    # python archive.py games.txt games.bga
+    with open(sys.argv[1]) as f:
+        written, skipped = convert(f, sys.argv[2])
+    print(f"{written} games written, {skipped} invalid games skipped")
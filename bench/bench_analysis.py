@@ -0,0 +1,86 @@
+"""
+Frame rate of the UI at the 60 fps cap with and without live analysis,
+browsing a game with undo, redo and new moves every half second so the
+analyzer keeps getting new positions. Runs on SDL's dummy video driver.
+
+    python -m bench.bench_analysis [seconds per mode]
+"""
+import os
+import random
+import time
+from sys import argv
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from analysis import Analyzer
+from bitboard import coords
+from main import Game
+
+
+def browse(game, seconds, seed=0):
+    # frame intervals of the capped loop while the position keeps changing
+    rng = random.Random(seed)
+    intervals = []
+    depths = []
+    start = last = time.perf_counter()
+    next_change = start
+    while last - start < seconds:
+        now = time.perf_counter()
+        if now >= next_change:
+            next_change = now + 0.5
+            if game.analysis is not None:
+                depths.append(game.analysis.depth)
+            board = game.board
+            moves = board.bits.legal_moves(board.turn)
+            r = rng.random()
+            if board.over or not moves or r < 0.3:
+                board.undo()
+            elif r < 0.4:
+                board.redo()
+            else:
+                fr, to = rng.choice(moves)
+                board.move(coords(fr), coords(to))
+
+        pygame.event.pump()
+        game.render()
+        game.clock.tick(game.fps)
+        now = time.perf_counter()
+        intervals.append(now - last)
+        last = now
+    return intervals, depths
+
+
+def report(name, intervals, depths):
+    intervals = sorted(intervals[1:])
+    fps = len(intervals) / sum(intervals)
+    p50 = intervals[len(intervals) // 2]
+    p99 = intervals[int(len(intervals) * 0.99)]
+    line = (
+        f"  {name:18s} {fps:5.1f} fps  interval p50 {p50 * 1e3:5.1f} ms"
+        f"  p99 {p99 * 1e3:5.1f} ms  max {intervals[-1] * 1e3:5.1f} ms"
+    )
+    if depths:
+        line += f"  depth at change {sum(depths) / len(depths):.1f}"
+    print(line)
+
+
+def main():
+    seconds = float(argv[1]) if len(argv) > 1 else 10.0
+    print(f"{os.cpu_count()} cpus")
+
+    game = Game()
+    report("no analysis", *browse(game, seconds))
+    pygame.quit()
+
+    with Analyzer() as analyzer:
+        game = Game(analyzer=analyzer)
+        report("live analysis", *browse(game, seconds))
+        print(f"  {analyzer.updates} analysis updates")
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Size and load time of the binary game archive against the text format.
+
+    python -m bench.bench_archive [games]
+"""
+import os
+import random
+import tempfile
+import time
+from sys import argv
+
+from archive import ArchiveReader, convert
+from notation import parse_move, split_game
+from bench.positions import random_game_strings
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def load_text(path):
+    with open(path) as f:
+        return [[parse_move(m) for m in split_game(line)] for line in f]
+
+
+def load_archive(path):
+    with ArchiveReader(path) as reader:
+        return [reader.moves(k) for k in range(len(reader))]
+
+
+def random_access_text(path, probes):
+    # game k and ply n from text means reading every line up to k
+    with open(path) as f:
+        lines = f.readlines()
+    return [parse_move(split_game(lines[k])[n]) for k, n in probes]
+
+
+def random_access_archive(path, probes):
+    with ArchiveReader(path) as reader:
+        return [reader.move(k, n) for k, n in probes]
+
+
+def main():
+    n = int(argv[1]) if len(argv) > 1 else 5000
+    games = random_game_strings(n)
+    rng = random.Random(1)
+    probes = [(k, rng.randrange(len(split_game(games[k])))) for k in (rng.randrange(n) for _ in range(1000))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path = os.path.join(tmp, "games.txt")
+        archive_path = os.path.join(tmp, "games.bga")
+        with open(text_path, "w") as f:
+            f.write("\n".join(games) + "\n")
+
+        with open(text_path) as f:
+            (written, _), convert_time = timed(convert, f, archive_path)
+
+        text_size = os.path.getsize(text_path)
+        archive_size = os.path.getsize(archive_path)
+        plies = sum(len(split_game(g)) for g in games)
+
+        text_moves, text_load = timed(load_text, text_path)
+        archive_moves, archive_load = timed(load_archive, archive_path)
+        assert text_moves == archive_moves
+
+        text_hits, text_access = timed(random_access_text, text_path, probes)
+        archive_hits, archive_access = timed(random_access_archive, archive_path, probes)
+        assert text_hits == archive_hits
+
+    print(f"{written} games, {plies} plies, converted in {convert_time:.2f} s")
+    print(f"  size       text {text_size:10d} B  archive {archive_size:10d} B  x{text_size / archive_size:.1f}")
+    print(f"  full load  text {text_load:10.3f} s  archive {archive_load:10.3f} s")
+    print(f"  1000 probes text {text_access:9.3f} s  archive {archive_access:10.4f} s")
+
+
+if __name__ == "__main__":
+    main()
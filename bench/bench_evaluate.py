@@ -0,0 +1,51 @@
+"""
+Evaluation throughput one position at a time against whole batches, and
+the effect of the Evaluator cache on positions that repeat.
+
+    python -m bench.bench_evaluate [positions]
+"""
+import time
+from sys import argv
+
+import numpy as np
+
+from evaluation import Evaluator, evaluate_batch
+from bench.positions import random_positions
+
+
+def main():
+    n = int(argv[1]) if len(argv) > 1 else 20_000
+    positions = random_positions(n)
+    grids = np.stack([pos.to_grid() for pos, _ in positions])
+    sides = np.array([side for _, side in positions], dtype=np.int8)
+
+    start = time.perf_counter()
+    single = [evaluate_batch(grid, side)[0] for grid, side in zip(grids, sides)]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = evaluate_batch(grids, sides)
+    batch_time = time.perf_counter() - start
+    assert np.allclose(single, batch)
+
+    evaluator = Evaluator(cache_size=n)
+    start = time.perf_counter()
+    evaluator.evaluate_many(grids, sides)
+    cold_time = time.perf_counter() - start
+    cold = evaluator.stats()
+
+    evaluator.hits = evaluator.misses = 0
+    start = time.perf_counter()
+    cached = evaluator.evaluate_many(grids, sides)
+    warm_time = time.perf_counter() - start
+    assert np.allclose(cached, batch)
+
+    print(f"{n} positions")
+    print(f"  single          {n / single_time:12.0f} evals/s")
+    print(f"  batched         {n / batch_time:12.0f} evals/s")
+    print(f"  cached, cold    {n / cold_time:12.0f} evals/s  hit rate {cold['hit_rate']:.1%}")
+    print(f"  cached, warm    {n / warm_time:12.0f} evals/s  hit rate {evaluator.stats()['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Memory per ply and seek time of the delta move log against the old
+full-grid-copy-per-ply history, on a synthetic 10k ply line.
+
+    python -m bench.bench_history [plies]
+"""
+import random
+import time
+import tracemalloc
+from sys import argv
+
+import numpy as np
+
+from bitboard import BitBoard, PW, bits
+from history import MoveLog
+
+
+def synthetic_line(plies, seed=0):
+    # legal games are at most a few hundred plies, so shuffle pawns around
+    # freely instead, capturing now and then while material lasts
+    rng = random.Random(seed)
+    pos = BitBoard()
+    side = PW
+    moves = []
+    for _ in range(plies):
+        own, opp = (pos.white, pos.black) if side == PW else (pos.black, pos.white)
+        fr = rng.choice(list(bits(own)))
+        if opp.bit_count() > 8 and rng.random() < 0.05:
+            to = rng.choice(list(bits(opp)))
+        else:
+            empty = ((1 << 64) - 1) ^ (pos.white | pos.black)
+            to = rng.choice(list(bits(empty)))
+        moves.append((fr, to, pos.make_move(fr, to)))
+        side = -side
+    return moves
+
+
+def build_grid_history(moves):
+    history = [BitBoard().to_grid().astype(np.float64)]
+    for fr, to, _ in moves:
+        grid = history[-1].copy()
+        x1, y1, x2, y2 = fr & 7, fr >> 3, to & 7, to >> 3
+        grid[x2][y2] = grid[x1][y1]
+        grid[x1][y1] = 0
+        history.append(grid)
+    return history
+
+
+def build_move_log(moves, snapshot_every):
+    log = MoveLog(snapshot_every=snapshot_every)
+    for move in moves:
+        log.append(*move)
+    return log
+
+
+def measure(build, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(*args)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def seek_time(get, plies, n=2000, seed=1):
+    rng = random.Random(seed)
+    targets = [rng.randrange(plies + 1) for _ in range(n)]
+    start = time.perf_counter()
+    for ply in targets:
+        get(ply)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    plies = int(argv[1]) if len(argv) > 1 else 10_000
+    moves = synthetic_line(plies)
+    print(f"{plies} ply line")
+
+    history, size, elapsed = measure(build_grid_history, moves)
+    per_seek = seek_time(history.__getitem__, plies)
+    print(
+        f"  grid copies     {size / plies:8.1f} B/ply  build {elapsed * 1e3:7.1f} ms"
+        f"  seek {per_seek * 1e6:7.2f} us"
+    )
+    del history
+
+    for snapshot_every in (16, 64, 256):
+        log, size, elapsed = measure(build_move_log, moves, snapshot_every)
+        per_seek = seek_time(log.position, plies)
+        print(
+            f"  deltas (snap {snapshot_every:3d}) {size / plies:6.1f} B/ply  build {elapsed * 1e3:7.1f} ms"
+            f"  seek {per_seek * 1e6:7.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
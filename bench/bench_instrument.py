@@ -0,0 +1,75 @@
+"""
+Cost of instrument on board operations: random games played with
+Board.move and Board.undo, with instrumentation disabled, enabled, and
+disabled again, followed by short instrumented render sessions on SDL's
+dummy video driver, with dirty rectangles and with full redraws, each
+split into what a frame spends per method. With a path, the metrics of
+each session are also written as JSON next to it.
+
+    python -m bench.bench_instrument [games] [json path]
+"""
+import os
+import random
+import time
+from sys import argv
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import instrument
+from bitboard import coords
+from board import Board
+from main import Game
+from bench.bench_render import session
+
+
+def play_games(games, seed=0):
+    # random games, each unwound again with undo
+    rng = random.Random(seed)
+    board = Board()
+    start = time.perf_counter()
+    ops = 0
+    for _ in range(games):
+        board.reset()
+        while not board.over:
+            fr, to = rng.choice(board.bits.legal_moves(board.turn))
+            board.is_legal(coords(fr), coords(to))
+            board.move(coords(fr), coords(to))
+            ops += 2
+        while board.grid_idx:
+            board.undo()
+            ops += 1
+    return ops / (time.perf_counter() - start)
+
+
+def main():
+    games = int(argv[1]) if len(argv) > 1 else 300
+    json_path = argv[2] if len(argv) > 2 else None
+    original = Board.move
+
+    before = play_games(games)
+    instrument.enable(Board, Game)
+    enabled = play_games(games)
+    instrument.disable()
+    after = play_games(games)
+    assert Board.move is original
+
+    print(f"{games} games")
+    print(f"  disabled          {before:10.0f} ops/s")
+    print(f"  enabled           {enabled:10.0f} ops/s  ({before / enabled - 1:.0%} slower)")
+    print(f"  disabled again    {after:10.0f} ops/s")
+
+    for name, dirty in (("dirty rectangles", True), ("full redraw", False)):
+        instrument.enable(Board, Game)
+        session(Game(dirty_rendering=dirty, fps=0 if not dirty else 60), 2.0)
+        instrument.disable()
+        frame = instrument.metrics.histograms["frame.render"].summary()
+        print(f"{name}: {instrument.metrics.counters['frames']} frames, {frame['mean_us']:.0f} us/frame")
+        for metric, calls, us in instrument.metrics.frame_split():
+            print(f"  {metric:22s} {calls:6.2f} calls/frame {us:9.1f} us/frame")
+        if json_path:
+            instrument.dump(f"{json_path}.{'dirty' if dirty else 'full'}.json")
+
+
+if __name__ == "__main__":
+    main()
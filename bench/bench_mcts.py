@@ -0,0 +1,35 @@
+"""
+MCTS playouts per second from the start position as the worker count
+grows, to check that root parallelism scales with the cores available.
+
+    python -m bench.bench_mcts [seconds] [max workers]
+"""
+import os
+from sys import argv
+
+from bitboard import BitBoard, PW
+from mcts import MCTSPlayer
+
+
+def main():
+    seconds = float(argv[1]) if len(argv) > 1 else 2.0
+    max_workers = int(argv[2]) if len(argv) > 2 else os.cpu_count() or 1
+
+    counts = sorted({max_workers} | {1 << i for i in range(max_workers.bit_length())})
+    pos = BitBoard()
+    base = None
+    for workers in counts:
+        with MCTSPlayer(workers=workers, time_limit=seconds, seed=0) as player:
+            # warm the pool up so process start-up is not measured
+            player.search(pos.white, pos.black, PW, time_limit=0.05)
+            result = player.search(pos.white, pos.black, PW)
+        rate = result.playouts_per_second
+        base = base or rate
+        print(
+            f"  {workers:3d} workers  {result.playouts:8d} playouts"
+            f"  {rate:9.0f} playouts/s  x{rate / base:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Throughput of the batched move generator against Board.is_legal, after
+checking that both produce exactly the same moves.
+
+    python -m bench.bench_movegen [positions]
+"""
+import time
+from sys import argv
+
+import numpy as np
+
+from board import Board
+from movegen import legal_moves
+from bench.positions import random_positions
+
+
+def scalar_moves(board):
+    # every legal move found by probing Board.is_legal on each candidate
+    moves = []
+    grid = board.grid
+    for x in range(8):
+        for y in range(8):
+            if grid[x][y] != board.turn:
+                continue
+            for dx in (-1, 0, 1):
+                t = (x + dx, y - board.turn)
+                if board.is_legal((x, y), t):
+                    moves.append(((x, y), t))
+    return moves
+
+
+def main():
+    n = int(argv[1]) if len(argv) > 1 else 20_000
+    positions = random_positions(n)
+    grids = np.stack([pos.to_grid() for pos, _ in positions])
+    sides = np.array([side for _, side in positions], dtype=np.int8)
+
+    boards = [Board.from_bits(pos, side) for pos, side in positions]
+
+    start = time.perf_counter()
+    scalar = [scalar_moves(board) for board in boards]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index, fr, to = legal_moves(grids, sides)
+    batch_time = time.perf_counter() - start
+
+    batch = [[] for _ in range(n)]
+    for i, f, t in zip(index.tolist(), fr.tolist(), to.tolist()):
+        batch[i].append((tuple(f), tuple(t)))
+    mismatches = sum(sorted(a) != sorted(b) for a, b in zip(scalar, batch))
+
+    print(f"{n} positions, {len(index)} moves, {mismatches} mismatches")
+    print(f"  Board.is_legal  {n / scalar_time:12.0f} positions/s")
+    print(f"  batched         {n / batch_time:12.0f} positions/s")
+
+
+if __name__ == "__main__":
+    main()
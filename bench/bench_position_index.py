@@ -0,0 +1,143 @@
+"""
+Build throughput and query latency of the position index on a synthetic
+archive of random games, written straight from batched move generation.
+
+    python -m bench.bench_position_index [games] [work dir]
+"""
+import os
+import random
+import shutil
+import tempfile
+import time
+from sys import argv
+
+import numpy as np
+
+from archive import ArchiveReader, ArchiveWriter
+from bitboard import PW, PB
+from movegen import legal_move_mask, is_terminal, KIND_DX
+from position_index import PositionIndex
+
+
+def random_games(n, rng):
+    """
+    n uniformly random games played side by side, as move byte strings
+    and winners. Kinds of legal_move_mask line up with archive directions.
+    """
+    grids = np.zeros((n, 8, 8), dtype=np.int8)
+    grids[:, :, :2] = PB
+    grids[:, :, 6:] = PW
+    moves = np.zeros((n, 2 * 16 * 7), dtype=np.uint8)
+    plies = np.zeros(n, dtype=np.int64)
+    winners = np.zeros(n, dtype=np.int8)
+    live = np.arange(n)
+    side = PW
+    ply = 0
+    while len(live):
+        g = grids[live]
+        mask = legal_move_mask(g, side).reshape(len(live), -1)
+        done = is_terminal(g) | ~mask.any(axis=1)
+        if done.any():
+            ended = live[done]
+            white_won = ((g[done, :, 0] == PW).any(axis=1) | ~(g[done] == PB).any(axis=(1, 2)))
+            black_won = ((g[done, :, 7] == PB).any(axis=1) | ~(g[done] == PW).any(axis=(1, 2)))
+            # stuck without a legal move loses
+            winners[ended] = np.where(white_won, PW, np.where(black_won, PB, -side))
+            plies[ended] = ply
+            live, mask = live[~done], mask[~done]
+            if not len(live):
+                break
+
+        choice = np.argmax(rng.random(mask.shape) * mask, axis=1)
+        kind, x, y = choice // 64, (choice // 8) % 8, choice % 8
+        tx, ty = x + KIND_DX[kind], y - side
+        moves[live, ply] = (y * 8 + x) | (kind << 6)
+        grids[live, tx, ty] = side
+        grids[live, x, y] = 0
+        side = -side
+        ply += 1
+    return moves, plies, winners
+
+
+def synthetic_archive(path, games, seed=0, batch=20_000):
+    rng = np.random.default_rng(seed)
+    with ArchiveWriter(path) as writer:
+        for lo in range(0, games, batch):
+            moves, plies, winners = random_games(min(batch, games - lo), rng)
+            for row, n, won in zip(moves, plies.tolist(), winners.tolist()):
+                writer.add_move_bytes(row[:n].tobytes(), won)
+
+
+def timed_queries(index, positions):
+    lookups, stats = [], []
+    for white, black, side in positions:
+        start = time.perf_counter()
+        index.lookup(white, black, side)
+        lookups.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        index.move_stats(white, black, side)
+        stats.append(time.perf_counter() - start)
+    return np.array(lookups) * 1000, np.array(stats) * 1000
+
+
+def main():
+    games = int(argv[1]) if len(argv) > 1 else 1_000_000
+    work = argv[2] if len(argv) > 2 else tempfile.mkdtemp()
+    os.makedirs(work, exist_ok=True)
+    archive_path = os.path.join(work, "synthetic.bga")
+    extra_path = os.path.join(work, "extra.bga")
+    index_dir = os.path.join(work, "index")
+
+    # archives are kept in the work dir, so later runs skip this step
+    if not os.path.exists(archive_path):
+        start = time.perf_counter()
+        synthetic_archive(archive_path, games)
+        synthetic_archive(extra_path, 10_000, seed=1)
+        print(f"wrote {games} random games in {time.perf_counter() - start:.1f} s")
+    shutil.rmtree(index_dir, ignore_errors=True)
+
+    with ArchiveReader(archive_path) as reader:
+        games = len(reader)
+    index = PositionIndex(index_dir)
+    start = time.perf_counter()
+    index.append(archive_path)
+    elapsed = time.perf_counter() - start
+
+    # then a small incremental append on top
+    start = time.perf_counter()
+    index.append(extra_path)
+    appended = time.perf_counter() - start
+    postings = index.postings_count()
+    built = postings * games / len(index)
+    size = sum(os.path.getsize(os.path.join(index_dir, f)) for f in os.listdir(index_dir))
+    print(f"{len(index)} games, {postings} positions")
+    print(f"  build     {elapsed:7.1f} s  {games / elapsed:9.0f} games/s  {built / elapsed:10.0f} positions/s")
+    print(f"  append    {appended:7.1f} s  for 10000 more games")
+    print(f"  size      {size / 1e6:7.0f} MB  {size / postings:.1f} bytes/position  {len(index.manifest['segments'])} segments")
+
+    # query positions taken from random games at random plies
+    rng = random.Random(0)
+    positions = []
+    with ArchiveReader(archive_path) as reader:
+        for _ in range(200):
+            k = rng.randrange(games)
+            plies, _ = reader.header(k)
+            board = reader.board(k, rng.randrange(min(plies, 12) + 1))
+            positions.append((board.bits.white, board.bits.black, board.turn))
+    index = PositionIndex(index_dir)
+    index.segments()
+    lookups, stats = timed_queries(index, positions)
+    print(f"  lookup    p50 {np.percentile(lookups, 50):6.2f} ms  p99 {np.percentile(lookups, 99):6.2f} ms")
+    print(f"  stats     p50 {np.percentile(stats, 50):6.2f} ms  p99 {np.percentile(stats, 99):6.2f} ms")
+
+    start = time.perf_counter()
+    index.compact()
+    print(f"  compact   {time.perf_counter() - start:7.1f} s")
+    index = PositionIndex(index_dir)
+    index.segments()
+    lookups, stats = timed_queries(index, positions)
+    print(f"  lookup    p50 {np.percentile(lookups, 50):6.2f} ms  p99 {np.percentile(lookups, 99):6.2f} ms  (compacted)")
+
+
+if __name__ == "__main__":
+    main()
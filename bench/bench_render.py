@@ -0,0 +1,73 @@
+"""
+Frame time and CPU usage of the pygame frontend, full redraw without a
+frame cap (the old Game.run loop) against dirty rectangle rendering with
+the 60 fps cap. Runs on SDL's dummy video driver, no window needed.
+
+    python -m bench.bench_render [seconds per mode]
+"""
+import os
+import random
+import time
+from sys import argv
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from bitboard import coords
+from main import Game
+
+
+def session(game, seconds, seed=0):
+    # idle frames with a move, undo or redo every half second or so
+    rng = random.Random(seed)
+    frame_times = []
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    next_change = wall_start
+    while time.perf_counter() - wall_start < seconds:
+        now = time.perf_counter()
+        if now >= next_change:
+            next_change = now + 0.5
+            board = game.board
+            moves = board.bits.legal_moves(board.turn)
+            if board.over or not moves or rng.random() < 0.2:
+                board.undo()
+            else:
+                fr, to = rng.choice(moves)
+                board.move(coords(fr), coords(to))
+
+        pygame.event.pump()
+        start = time.perf_counter()
+        game.render()
+        frame_times.append(time.perf_counter() - start)
+        game.clock.tick(game.fps)
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    return frame_times, wall, cpu
+
+
+def report(name, frame_times, wall, cpu):
+    frame_times = sorted(frame_times)
+    mean = sum(frame_times) / len(frame_times)
+    p99 = frame_times[int(len(frame_times) * 0.99)]
+    print(
+        f"  {name:22s} {len(frame_times) / wall:7.0f} fps  frame {mean * 1e3:6.3f} ms"
+        f"  p99 {p99 * 1e3:6.3f} ms  cpu {100 * cpu / wall:5.1f}%"
+    )
+
+
+def main():
+    seconds = float(argv[1]) if len(argv) > 1 else 5.0
+    for name, kwargs in (
+        ("full redraw, uncapped", dict(dirty_rendering=False, fps=0)),
+        ("dirty rects, 60 fps", dict(dirty_rendering=True, fps=60)),
+    ):
+        game = Game(**kwargs)
+        report(name, *session(game, seconds))
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Nodes per second of the alpha-beta engine at a fixed depth over a fixed
+set of positions. Node counts are deterministic, so a change in them
+means the search itself changed, not just its speed.
+
+    python -m bench.bench_search [depth]
+"""
+import time
+from sys import argv
+
+from search import Engine
+from bench.positions import random_positions
+
+# every 20th position of a few random games, openings to endgames
+POSITIONS = random_positions(400, seed=4)[::20]
+
+
+def main():
+    depth = int(argv[1]) if len(argv) > 1 else 4
+    total_nodes = 0
+    total_time = 0.0
+    for i, (pos, side) in enumerate(POSITIONS):
+        engine = Engine()
+        start = time.perf_counter()
+        result = engine.search(pos.white, pos.black, side, depth=depth)
+        elapsed = time.perf_counter() - start
+        total_nodes += result.nodes
+        total_time += elapsed
+        print(
+            f"  {i:3d}  nodes {result.nodes:8d}  score {result.score:7d}"
+            f"  {result.nodes / elapsed:9.0f} nps"
+        )
+    print(
+        f"depth {depth}: {len(POSITIONS)} positions, {total_nodes} nodes,"
+        f" {total_time:.2f} s, {total_nodes / total_time:.0f} nps"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Load test for server.py: starts a server process, connects many sessions
+that each play random legal moves with some think time in between, and
+reports move round-trip latency percentiles and sessions per core.
+
+    python -m bench.bench_server [sessions] [seconds] [think seconds]
+
+Sessions per core is the session count divided by the share of one core
+the server used, i.e. how many sessions at this move rate one core holds.
+"""
+import asyncio
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from sys import argv
+
+import numpy as np
+
+from bitboard import BitBoard, PW, PB, coords
+from notation import format_move
+from server import raise_open_file_limit
+
+PORT = 8766
+
+
+async def open_session(rng):
+    # connections are retried while the server is still starting up
+    for _ in range(100):
+        try:
+            return await asyncio.open_connection("127.0.0.1", PORT)
+        except OSError:
+            await asyncio.sleep(0.05 + rng.random() * 0.05)
+    raise RuntimeError("server did not come up")
+
+
+def parse_state(line):
+    # (side to move, winner, white mask, black mask) from a state line
+    _, _, turn, winner, _, cells = line.split()
+    white = black = 0
+    for sq, cell in enumerate(cells):
+        if cell == "w":
+            white |= 1 << sq
+        elif cell == "b":
+            black |= 1 << sq
+    return turn, winner, white, black
+
+
+async def client(seed, deadline, think, latencies):
+    rng = random.Random(seed)
+    reader, writer = await open_session(rng)
+
+    async def send(line):
+        start = time.perf_counter()
+        writer.write(line.encode() + b"\n")
+        reply = (await reader.readline()).decode()
+        latencies.append(time.perf_counter() - start)
+        return reply
+
+    reply = await send("new")
+    # spread the first moves over one think interval
+    await asyncio.sleep(rng.random() * think)
+    while time.perf_counter() < deadline:
+        turn, winner, white, black = parse_state(reply)
+        legal = BitBoard(white, black).legal_moves(PW if turn == "white" else PB)
+        if winner != "none" or not legal:
+            reply = await send("new")
+            continue
+        fr, to = rng.choice(legal)
+        capture = bool((white | black) & (1 << to))
+        reply = await send(format_move(coords(fr), coords(to), capture))
+        if not reply.startswith("state"):
+            raise RuntimeError(f"server refused a legal move: {reply.strip()}")
+        await asyncio.sleep(think * (0.5 + rng.random()))
+
+    writer.write(b"quit\n")
+    await writer.drain()
+    writer.close()
+
+
+async def run_clients(sessions, seconds, think):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*(client(i, deadline, think, latencies) for i in range(sessions)))
+    return latencies
+
+
+def main():
+    sessions = int(argv[1]) if len(argv) > 1 else 1000
+    seconds = float(argv[2]) if len(argv) > 2 else 10.0
+    think = float(argv[3]) if len(argv) > 3 else 1.0
+    limit = raise_open_file_limit()
+    if sessions + 64 > limit:
+        print(f"open file limit is {limit}, expect connection errors")
+
+    # the server's status lines would mix with the results
+    server = subprocess.Popen(
+        [sys.executable, "server.py", str(PORT)],
+        env={**os.environ, "BREAKTHROUGH_LOG": "warning"},
+    )
+    try:
+        start = time.perf_counter()
+        latencies = asyncio.run(run_clients(sessions, seconds, think))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = usage.ru_utime + usage.ru_stime
+
+    ms = np.array(latencies) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    load = cpu / elapsed
+    print(f"{sessions} sessions, {len(ms)} round trips in {elapsed:.1f} s, {len(ms) / elapsed:.0f}/s")
+    print(f"  latency  p50 {p50:.2f} ms  p90 {p90:.2f} ms  p99 {p99:.2f} ms  max {ms.max():.2f} ms")
+    print(f"  server   {cpu:.2f} s cpu, {load:.1%} of a core, {sessions / max(load, 1e-9):.0f} sessions per core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Cold start time of a fresh interpreter that imports the rules core, a
+tool built on it, or the pygame UI, as the median of several runs.
+
+    python -m bench.bench_startup [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+from sys import argv
+
+TARGETS = {
+    "python only": "pass",
+    "board": "import board; board.Board()",
+    "board + grid": "import board; board.Board().grid",
+    "replay": "import replay",
+    "main (pygame UI)": "import main",
+}
+
+
+def cold_start(code, runs):
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, env=env)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    runs = int(argv[1]) if len(argv) > 1 else 10
+    base = cold_start("pass", runs)
+    for name, code in TARGETS.items():
+        seconds = cold_start(code, runs)
+        print(f"  {name:18s} {seconds * 1000:8.1f} ms  (+{(seconds - base) * 1000:.1f} ms imports)")
+    # modules that must stay out of the core
+    code = "import sys, board; print(sorted({'pygame', 'numpy'} & set(sys.modules)))"
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    print(f"  heavy modules loaded by board: {loaded.stdout.strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+How much smaller position tables get keyed on the canonical key instead
+of the plain Zobrist key, and what keeping the symmetric keys costs per
+move.
+
+Three position sets: the whole game tree to a few plies, every position
+of many random games, and every small endgame (up to three pawns), the
+kind of set a tablebase or a solver stores.
+
+    python -m bench.bench_symmetry [depth] [games]
+"""
+import random
+import time
+import tracemalloc
+from itertools import combinations
+from sys import argv
+
+from bitboard import BitBoard, PW, PB
+from board import Board
+from counters import Counters
+from symmetry import SymmetricHash
+from bench.positions import random_game
+
+
+def tree_positions(depth):
+    # (position, side) of every node of the game tree down to depth plies
+    positions = []
+
+    def walk(pos, side, d):
+        positions.append((BitBoard(pos.white, pos.black), side))
+        if d == 0 or pos.winner():
+            return
+        for fr, to in pos.legal_moves(side):
+            captured = pos.make_move(fr, to)
+            walk(pos, -side, d - 1)
+            pos.unmake_move(fr, to, captured)
+
+    walk(BitBoard(), PW, depth)
+    return positions
+
+
+def game_positions(games, seed=0):
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(games):
+        positions.extend(random_game(rng))
+    return positions
+
+
+def endgame_positions(pawns=3):
+    # white pawns on rows 1-7, black on rows 0-6, at least one each
+    positions = []
+    for nw in range(1, pawns):
+        for nb in range(1, pawns - nw + 1):
+            for ws in combinations(range(8, 64), nw):
+                white = sum(1 << sq for sq in ws)
+                for bs in combinations(range(56), nb):
+                    black = sum(1 << sq for sq in bs)
+                    if white & black:
+                        continue
+                    for side in (PW, PB):
+                        positions.append((BitBoard(white, black), side))
+    return positions
+
+
+def keys(positions):
+    # (plain key, canonical key) of every position
+    result = []
+    for pos, side in positions:
+        hashes = SymmetricHash.from_bits(pos, side)
+        result.append((hashes.key, hashes.canonical()[0]))
+    return result
+
+
+def table_size(keys):
+    # entries and bytes of a dict shaped like a transposition table
+    tracemalloc.start()
+    entries = {key: (0, 0, None) for key in keys}
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(entries), size
+
+
+def move_overhead(plies=200_000, seed=0):
+    # make/unmake through Board, and the counters and keys on their own
+    rng = random.Random(seed)
+    board = Board()
+    line = []
+    pos, side = BitBoard(), PW
+    while len(line) < plies:
+        if pos.winner():
+            pos, side = BitBoard(), PW
+            line.append(None)
+            continue
+        fr, to = rng.choice(pos.legal_moves(side))
+        captured = pos.make_move(fr, to)
+        line.append((fr, to, side, captured))
+        side = -side
+
+    def timed(apply, reset):
+        reset()
+        start = time.perf_counter()
+        for move in line:
+            if move is None:
+                reset()
+            else:
+                apply(*move)
+        return (time.perf_counter() - start) / plies * 1e9
+
+    counters = Counters.from_bits(BitBoard())
+    hashes = SymmetricHash.from_bits(BitBoard(), PW)
+    results = {
+        "counters.apply": timed(counters.apply, lambda: None),
+        "hashes.apply": timed(hashes.apply, lambda: None),
+        "hashes.canonical": timed(lambda *move: hashes.canonical(), lambda: None),
+    }
+
+    def board_make(fr, to, side, captured):
+        board.make(fr, to)
+
+    # make() leaves the history empty, so seek(0) is the start position
+    results["Board.make"] = timed(board_make, lambda: board.seek(0))
+    return results
+
+
+def main():
+    depth = int(argv[1]) if len(argv) > 1 else 4
+    games = int(argv[2]) if len(argv) > 2 else 2000
+
+    sets = {
+        f"game tree, {depth} plies": tree_positions(depth),
+        f"{games} random games": game_positions(games),
+        "endgames, 3 pawns": endgame_positions(3),
+    }
+    for name, positions in sets.items():
+        plain_keys, canonical_keys = zip(*keys(positions))
+        plain, plain_bytes = table_size(plain_keys)
+        classes, canonical_bytes = table_size(canonical_keys)
+        print(f"{name}: {len(positions)} positions")
+        print(f"  plain keys      {plain:9d} entries  {plain_bytes / 2**20:8.1f} MB")
+        print(
+            f"  canonical keys  {classes:9d} entries  {canonical_bytes / 2**20:8.1f} MB"
+            f"  ({plain / classes:.2f}x fewer)"
+        )
+
+    print("per move")
+    for name, ns in move_overhead().items():
+        print(f"  {name:18s} {ns:8.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Tablebase generation time and probe latency.
+
+    python -m bench.bench_tablebase [K] [workers]
+"""
+import os
+import random
+import tempfile
+import time
+from sys import argv
+
+from bitboard import PW, PB
+from tablebase import Tablebase, generate
+
+
+def random_position(rng, k):
+    while True:
+        nw, nb = rng.randint(1, k), rng.randint(1, k)
+        ws = rng.sample(range(8, 64), nw)
+        bs = rng.sample(range(0, 56), nb)
+        if not set(ws) & set(bs):
+            return sum(1 << sq for sq in ws), sum(1 << sq for sq in bs), rng.choice((PW, PB))
+
+
+def main():
+    k = int(argv[1]) if len(argv) > 1 else 2
+    workers = int(argv[2]) if len(argv) > 2 else None
+    rng = random.Random(0)
+    probes = [random_position(rng, k) for _ in range(100_000)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        generate(tmp, k, workers)
+        size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp))
+        print(f"  {size / 1e6:.1f} MB on disk")
+
+        tb = Tablebase(tmp)
+        start = time.perf_counter()
+        tb.probe(*probes[0])
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for probe in probes:
+            tb.probe(*probe)
+        warm = (time.perf_counter() - start) / len(probes)
+        print(f"  probe: first {cold * 1e6:.0f} us (maps the table), then {warm * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
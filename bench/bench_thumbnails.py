@@ -0,0 +1,71 @@
+"""
+Offscreen rendering throughput: drawing only and drawing plus PNG
+encoding at several sizes, against setting up the sprites, background
+and glyphs again for every image, and whole frame sequences over a
+process pool.
+
+    python -m bench.bench_thumbnails [games] [workers]
+"""
+import os
+import tempfile
+import time
+from sys import argv
+
+import render
+from bench.positions import random_game_strings, random_positions
+
+SIZES = (64, 128, 256, 512)
+
+
+def rate(fn, n):
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    games = int(argv[1]) if len(argv) > 1 else 200
+    workers = int(argv[2]) if len(argv) > 2 else os.cpu_count() or 1
+    positions = random_positions(2000)
+    game_strs = random_game_strings(games)
+
+    with tempfile.TemporaryDirectory() as out:
+        path = os.path.join(out, "image.png")
+        print("images/s      draw   draw+png   setup per image")
+        for size in SIZES:
+            r = render.renderer(size)
+            n = len(positions)
+
+            def draw(i):
+                pos, _ = positions[i % n]
+                return r.position(pos.white, pos.black, ply=i)
+
+            def draw_png(i):
+                render.save_png(draw(i), path)
+
+            def setup_png(i):
+                # no reuse: decode and scale the sprites, build the background
+                render._sprites.clear()
+                pos, _ = positions[i % n]
+                render.save_png(render.Renderer(size).position(pos.white, pos.black, ply=i), path)
+
+            print(
+                f"  {size:4d}px {rate(draw, n):9.0f} {rate(draw_png, n // 4):10.0f}"
+                f" {rate(setup_png, 20):17.1f}"
+            )
+
+        numbered = list(enumerate(game_strs))
+        for w in sorted({1, workers}):
+            start = time.perf_counter()
+            chunks = render.render_games("frames", numbered, os.path.join(out, f"w{w}"), 128, w)
+            images = sum(count for count, _ in chunks)
+            elapsed = time.perf_counter() - start
+            print(
+                f"frames of {games} games at 128px, {w} workers: {images} images,"
+                f" {images / elapsed:.0f} images/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Reproducible positions for the benchmarks."""
+import random
+
+from bitboard import BitBoard, PW, coords
+from notation import format_move
+
+
+def random_game(rng):
+    # list of (position, side to move) for one uniformly random game
+    pos = BitBoard()
+    side = PW
+    game = []
+    while not pos.winner():
+        game.append((pos.copy(), side))
+        moves = pos.legal_moves(side)
+        pos.make_move(*rng.choice(moves))
+        side = -side
+    return game
+
+
+def random_positions(n, seed=0):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < n:
+        positions.extend(random_game(rng))
+    return positions[:n]
+
+
+def random_game_string(rng):
+    # one uniformly random game in 'a2-a3;...' notation
+    pos = BitBoard()
+    side = PW
+    moves = []
+    while not pos.winner():
+        fr, to = rng.choice(pos.legal_moves(side))
+        capture = pos.make_move(fr, to)
+        moves.append(format_move(coords(fr), coords(to), capture))
+        side = -side
+    return ";".join(moves)
+
+
+def random_game_strings(n, seed=0):
+    rng = random.Random(seed)
+    return [random_game_string(rng) for _ in range(n)]
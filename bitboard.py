@@ -0,0 +1,225 @@
+# numpy is imported where it is used, so the rules load without it
+PW = 1
+PB = -1
+
+# squares are numbered sq = y * 8 + x, so bit 0 is a8 (grid[0][0]) and
+# bit 63 is h1 (grid[7][7]). white moves towards y = 0, black towards y = 7.
+FULL = (1 << 64) - 1
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL ^ FILE_A
+NOT_FILE_H = FULL ^ FILE_H
+ROW_0 = 0xFF
+ROW_7 = 0xFF << 56
+
+START_BLACK = 0xFFFF
+START_WHITE = 0xFFFF << 48
+
+
+def square(x, y):
+    return y * 8 + x
+
+
+def coords(sq):
+    return sq & 7, sq >> 3
+
+
+def bits(mask):
+    # yield the square of every set bit, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def move_targets(white, black, side):
+    """
+    Shift generated destination masks for every pawn of side.
+    Returns (forward, left, right), where left/right are the diagonal
+    moves towards file a/h. The source of a target sq is sq - shift for
+    the shifts returned by move_shifts(side).
+    """
+    empty = FULL ^ (white | black)
+    if side == PW:
+        forward = (white >> 8) & empty
+        left = ((white & NOT_FILE_A) >> 9) & ~white
+        right = ((white & NOT_FILE_H) >> 7) & ~white
+    else:
+        forward = (black << 8) & empty
+        left = ((black & NOT_FILE_A) << 7) & ~black & FULL
+        right = ((black & NOT_FILE_H) << 9) & ~black & FULL
+    return forward, left, right
+
+
+def move_shifts(side):
+    # to_sq - from_sq for (forward, left, right), matching move_targets
+    if side == PW:
+        return -8, -9, -7
+    return 8, 7, 9
+
+
+def moves(white, black, side):
+    # (from_sq, to_sq) for every legal move of side
+    result = []
+    for targets, shift in zip(move_targets(white, black, side), move_shifts(side)):
+        while targets:
+            low = targets & -targets
+            to = low.bit_length() - 1
+            result.append((to - shift, to))
+            targets ^= low
+    return result
+
+
+def play(white, black, side, fr, to):
+    # (white, black) after side moves from fr to to
+    src = 1 << fr
+    dst = 1 << to
+    if side == PW:
+        return white ^ (src | dst), black & ~dst
+    return white & ~dst, black ^ (src | dst)
+
+
+def winner(white, black):
+    # a pawn on the far row wins, as does capturing every enemy pawn
+    if white & ROW_0 or not black:
+        return PW
+    if black & ROW_7 or not white:
+        return PB
+    return 0
+
+
+def mask_to_array(mask):
+    # 64 bit mask -> (8, 8) bool array indexed [x][y] like Board.grid
+    import numpy as np
+
+    raw = np.array([mask], dtype="<u8").view(np.uint8)
+    return np.unpackbits(raw, bitorder="little").reshape(8, 8).T
+
+
+def array_to_mask(arr):
+    # inverse of mask_to_array
+    import numpy as np
+
+    packed = np.packbits(np.asarray(arr, dtype=bool).T.ravel(), bitorder="little")
+    return int(packed.view("<u8")[0])
+
+
+class BitBoard:
+    """Position stored as one 64 bit occupancy mask per side."""
+
+    __slots__ = ("white", "black")
+
+    def __init__(self, white=START_WHITE, black=START_BLACK):
+        self.white = white
+        self.black = black
+
+    @classmethod
+    def from_grid(cls, grid):
+        import numpy as np
+
+        grid = np.asarray(grid)
+        return cls(array_to_mask(grid == PW), array_to_mask(grid == PB))
+
+    def copy(self):
+        return BitBoard(self.white, self.black)
+
+    def key(self):
+        return self.white, self.black
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, BitBoard)
+            and self.white == other.white
+            and self.black == other.black
+        )
+
+    def __hash__(self):
+        return hash((self.white, self.black))
+
+    def __repr__(self):
+        return f"BitBoard(white={self.white:#018x}, black={self.black:#018x})"
+
+    def to_grid(self, dtype="int8"):
+        grid = mask_to_array(self.white).astype(dtype)
+        grid -= mask_to_array(self.black).astype(dtype)
+        return grid
+
+    def piece_at(self, x, y):
+        bit = 1 << square(x, y)
+        if self.white & bit:
+            return PW
+        if self.black & bit:
+            return PB
+        return 0
+
+    def white_material(self):
+        return self.white.bit_count()
+
+    def black_material(self):
+        return self.black.bit_count()
+
+    def winner(self):
+        return winner(self.white, self.black)
+
+    def is_legal(self, f, t):
+        x1, y1 = f
+        x2, y2 = t
+
+        if not (0 <= x1 < 8 and 0 <= y1 < 8 and 0 <= x2 < 8 and 0 <= y2 < 8):
+            return False
+
+        src = 1 << square(x1, y1)
+        dst = 1 << square(x2, y2)
+
+        if self.white & src:
+            own, dy = self.white, -1
+        elif self.black & src:
+            own, dy = self.black, 1
+        else:
+            return False
+
+        if y2 - y1 != dy:
+            return False
+
+        dx = x2 - x1
+        if dx == 0:
+            # cannot capture forward
+            return not (self.white | self.black) & dst
+        if dx == 1 or dx == -1:
+            # can not kill own piece
+            return not own & dst
+        return False
+
+    def move_targets(self, side):
+        # (forward, left, right) destination masks, see move_targets()
+        return move_targets(self.white, self.black, side)
+
+    def legal_moves(self, side):
+        # list of (from_sq, to_sq) for side
+        return moves(self.white, self.black, side)
+
+    def make_move(self, fr, to):
+        # apply a (from_sq, to_sq) move, return the captured piece (0 if none)
+        src = 1 << fr
+        dst = 1 << to
+        if self.white & src:
+            captured = PB if self.black & dst else 0
+            self.white ^= src | dst
+            self.black &= ~dst
+        else:
+            captured = PW if self.white & dst else 0
+            self.black ^= src | dst
+            self.white &= ~dst
+        return captured
+
+    def unmake_move(self, fr, to, captured):
+        src = 1 << fr
+        dst = 1 << to
+        if self.white & dst:
+            self.white ^= src | dst
+            if captured:
+                self.black |= dst
+        else:
+            self.black ^= src | dst
+            if captured:
+                self.white |= dst
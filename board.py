@@ -0,0 +1,213 @@
+"""
+The rules of the game and the move history, with no pygame dependency so
+headless tools start fast. The window lives in main.py.
+"""
+import logging
+
+from bitboard import BitBoard, PW, PB, square
+from counters import Counters
+from history import MoveLog
+from symmetry import SymmetricHash, transform_position
+
+log = logging.getLogger(__name__)
+
+START_COUNTERS = Counters.from_bits(BitBoard())
+START_HASHES = SymmetricHash.from_bits(BitBoard(), PW)
+
+
+class Board:
+    def __init__(self, snapshot_every=64):
+
+        self.turn = PW
+        self.history = MoveLog(snapshot_every=snapshot_every)
+        self.grid_idx = 0
+        self.alternate_history = None
+        self.alternate_idx = None
+
+        # the displayed position, kept in sync by applying or reverting deltas
+        self.bits = BitBoard()
+        self.counters = START_COUNTERS.copy()
+        self.hashes = START_HASHES.copy()
+        # what seek(0) goes back to
+        self.start_turn = PW
+        self.start_counters = START_COUNTERS
+        self.start_hashes = START_HASHES
+
+        self._grid_key = None
+        self._grid = None
+
+    @classmethod
+    def from_bits(cls, position, turn, snapshot_every=64):
+        """A board starting from any position, with turn to move."""
+        board = cls(snapshot_every)
+        board.history = MoveLog(position, snapshot_every=snapshot_every)
+        board.start_turn = turn
+        board.start_counters = Counters.from_bits(position)
+        board.start_hashes = SymmetricHash.from_bits(position, turn)
+        board.seek(0)
+        return board
+
+    @property
+    def winner(self):
+        return self.counters.winner()
+
+    @property
+    def over(self):
+        return self.winner != 0
+
+    @property
+    def grid(self):
+        """Read-only (8, 8) view of the current position, indexed [x][y]."""
+        if self.alternate_idx is not None:
+            log.debug("returning alternate history")
+        bits = self.bits
+        key = bits.key()
+        if key != self._grid_key:
+            self._grid = bits.to_grid()
+            self._grid.flags.writeable = False
+            self._grid_key = key
+        return self._grid
+
+    def add_move(self, fr, to, captured):
+        if self.alternate_idx is not None:
+            self.alternate_history.append(fr, to, captured)
+            self.alternate_idx += 1
+        elif self.grid_idx < len(self.history):
+            # branching off the main line, which is kept intact
+            self.alternate_history = MoveLog(self.history.position(self.grid_idx))
+            self.alternate_history.append(fr, to, captured)
+            self.alternate_idx = 0
+            log.debug("adding to alternate history")
+        else:
+            self.history.append(fr, to, captured)
+            self.grid_idx += 1
+
+    def black_material(self):
+        return self.counters.material[PB]
+
+    def white_material(self):
+        return self.counters.material[PW]
+
+    def pawns_on_file(self, side, x):
+        return self.counters.files[side][x]
+
+    def most_advanced(self, side):
+        # row of side's most advanced pawn, None if it has none left
+        return self.counters.most_advanced(side)
+
+    @property
+    def zobrist_key(self):
+        return self.hashes.key
+
+    def canonical_key(self):
+        """
+        (key, transform) shared by every position symmetric to this one,
+        see symmetry.py. Tables keyed on it store each class once.
+        """
+        return self.hashes.canonical()
+
+    def canonical(self):
+        # (white, black, side, transform) of the canonical form
+        _, transform = self.hashes.canonical()
+        return (*transform_position(self.bits.white, self.bits.black, self.turn, transform), transform)
+
+    def check_consistency(self):
+        # the incremental counters must match a full rescan of the position
+        expected = Counters.from_bits(self.bits)
+        if self.counters != expected:
+            raise AssertionError(
+                f"counters out of sync at ply {self.grid_idx}: material "
+                f"{self.counters.material}, expected {expected.material}"
+            )
+        if self.winner != self.bits.winner():
+            raise AssertionError(
+                f"winner {self.winner} at ply {self.grid_idx}, expected {self.bits.winner()}"
+            )
+        if self.hashes != SymmetricHash.from_bits(self.bits, self.turn):
+            raise AssertionError(f"zobrist keys out of sync at ply {self.grid_idx}")
+
+    def make(self, fr, to):
+        # play a move on the displayed position, the counters and the keys
+        mover = PW if self.bits.white & (1 << fr) else PB
+        captured = self.bits.make_move(fr, to)
+        self.counters.apply(fr, to, mover, captured)
+        self.hashes.apply(fr, to, mover, captured)
+        return captured
+
+    def unmake(self, fr, to, captured):
+        mover = PW if self.bits.white & (1 << to) else PB
+        self.bits.unmake_move(fr, to, captured)
+        self.counters.revert(fr, to, mover, captured)
+        self.hashes.revert(fr, to, mover, captured)
+
+    def move(self, f, t):
+
+        if not self.is_legal(f, t):
+            raise Exception(f"Illegal move, at {self.grid_idx}, from {f} to {t}")
+
+        x1, y1 = f
+        x2, y2 = t
+
+        fr, to = square(x1, y1), square(x2, y2)
+        captured = self.make(fr, to)
+        self.add_move(fr, to, captured)
+
+        self.turn *= -1
+
+    def undo(self):
+        if self.alternate_idx is not None:
+            self.unmake(*self.alternate_history.pop())
+            if self.alternate_idx > 0:
+                self.alternate_idx -= 1
+            else:
+                self.alternate_idx = None
+                self.alternate_history = None
+            self.turn *= -1
+
+        elif self.grid_idx > 0:
+            self.grid_idx -= 1
+            self.unmake(*self.history[self.grid_idx])
+            self.turn *= -1
+
+    def redo(self):
+        if self.alternate_idx is not None:
+            return
+
+        if self.grid_idx < len(self.history):
+            fr, to, _ = self.history[self.grid_idx]
+            self.make(fr, to)
+            self.grid_idx += 1
+            self.turn *= -1
+
+    def seek(self, n):
+        # jump to ply n of the main line, leaving any alternate line
+        self.alternate_history = None
+        self.alternate_idx = None
+        self.bits = self.history.position(n)
+        self.grid_idx = n
+        self.turn = self.start_turn if n % 2 == 0 else -self.start_turn
+        if n == 0:
+            self.counters = self.start_counters.copy()
+            self.hashes = self.start_hashes.copy()
+        else:
+            self.counters = Counters.from_bits(self.bits)
+            self.hashes = SymmetricHash.from_bits(self.bits, self.turn)
+
+    def beginning(self):
+        self.seek(0)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < 8 and 0 <= y < 8
+
+
+    def is_legal(self, f, t):
+        if self.over:
+            return False
+
+        return self.bits.is_legal(f, t)
+
+    def in_alternate(self):
+        return self.alternate_idx is not None
+
+    def reset(self):
+        self.__init__()
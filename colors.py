@@ -0,0 +1,6 @@
+# colours of the board and pieces, shared by the game window and render.py
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+DARK_BROWN = (139, 69, 19)
+LIGHT_BROWN = (222, 184, 135)
+SELECTED = (186, 97, 180)
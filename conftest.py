@@ -0,0 +1 @@
+# lets pytest import the modules at the top of the repo from tests/
@@ -0,0 +1,83 @@
+from bitboard import PW, PB, bits, coords
+
+
+class Counters:
+    """
+    Material, pawns per file and pawns per row for both sides, updated
+    move by move so nothing has to rescan the board.
+    """
+
+    __slots__ = ("material", "files", "rows")
+
+    def __init__(self):
+        self.material = {PW: 0, PB: 0}
+        self.files = {PW: [0] * 8, PB: [0] * 8}
+        self.rows = {PW: [0] * 8, PB: [0] * 8}
+
+    @classmethod
+    def from_bits(cls, position):
+        counters = cls()
+        for side, mask in ((PW, position.white), (PB, position.black)):
+            for sq in bits(mask):
+                x, y = coords(sq)
+                counters.material[side] += 1
+                counters.files[side][x] += 1
+                counters.rows[side][y] += 1
+        return counters
+
+    def copy(self):
+        counters = Counters()
+        counters.material = dict(self.material)
+        counters.files = {side: files[:] for side, files in self.files.items()}
+        counters.rows = {side: rows[:] for side, rows in self.rows.items()}
+        return counters
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Counters)
+            and self.material == other.material
+            and self.files == other.files
+            and self.rows == other.rows
+        )
+
+    def apply(self, fr, to, mover, captured):
+        # mover moved from square fr to square to, capturing captured (or 0)
+        fx, fy = coords(fr)
+        tx, ty = coords(to)
+        self.files[mover][fx] -= 1
+        self.files[mover][tx] += 1
+        self.rows[mover][fy] -= 1
+        self.rows[mover][ty] += 1
+        if captured:
+            self.material[captured] -= 1
+            self.files[captured][tx] -= 1
+            self.rows[captured][ty] -= 1
+
+    def revert(self, fr, to, mover, captured):
+        fx, fy = coords(fr)
+        tx, ty = coords(to)
+        self.files[mover][tx] -= 1
+        self.files[mover][fx] += 1
+        self.rows[mover][ty] -= 1
+        self.rows[mover][fy] += 1
+        if captured:
+            self.material[captured] += 1
+            self.files[captured][tx] += 1
+            self.rows[captured][ty] += 1
+
+    def most_advanced(self, side):
+        # row (y) of side's most advanced pawn, None without pawns
+        rows = self.rows[side]
+        order = range(8) if side == PW else range(7, -1, -1)
+        for y in order:
+            if rows[y]:
+                return y
+        return None
+
+    def winner(self):
+        # a pawn on its last row wins, and so does taking every enemy pawn
+        if self.rows[PW][0] or not self.material[PB]:
+            return PW
+        if self.rows[PB][7] or not self.material[PW]:
+            return PB
+        return 0
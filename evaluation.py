@@ -0,0 +1,174 @@
+"""
+Feature based position evaluation over stacks of (N, 8, 8) grids in the
+Board.grid layout, with a bounded LRU cache for repeated positions.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from bitboard import PW, PB
+
+FEATURES = (
+    "material",
+    "advancement",
+    "defended",
+    "attacked",
+    "open_files",
+    "threats",
+)
+
+# weight per unit of each feature, features are white minus black
+WEIGHTS = np.array([100.0, 5.0, 8.0, -12.0, 10.0, 50.0])
+# a pawn one step from the last row wins on the spot for the side to move
+WIN_SCORE = 10_000.0
+
+WHITE_PROGRESS = 7 - np.arange(8)
+BLACK_PROGRESS = np.arange(8)
+
+
+def _shift(a, dx, dy):
+    # out[:, x, y] = a[:, x - dx, y - dy], zero outside the board
+    out = np.zeros_like(a)
+    xs = slice(max(dx, 0), 8 + min(dx, 0))
+    ys = slice(max(dy, 0), 8 + min(dy, 0))
+    xs_src = slice(max(-dx, 0), 8 + min(-dx, 0))
+    ys_src = slice(max(-dy, 0), 8 + min(-dy, 0))
+    out[:, xs, ys] = a[:, xs_src, ys_src]
+    return out
+
+
+def _as_stack(grids):
+    grids = np.asarray(grids)
+    return grids[None] if grids.ndim == 2 else grids
+
+
+def features(grids):
+    """(N, len(FEATURES)) float array of white-minus-black features."""
+    grids = _as_stack(grids)
+    white = grids == PW
+    black = grids == PB
+
+    material = white.sum(axis=(1, 2)) - black.sum(axis=(1, 2))
+
+    # rows advanced from the home row, y is the last axis
+    advancement = (white.sum(axis=1) @ WHITE_PROGRESS) - (black.sum(axis=1) @ BLACK_PROGRESS)
+
+    # white captures towards y - 1, so its defenders stand at y + 1
+    white_guard = _shift(white, 1, -1) | _shift(white, -1, -1)
+    black_guard = _shift(black, 1, 1) | _shift(black, -1, 1)
+    defended = (white & white_guard).sum(axis=(1, 2)) - (black & black_guard).sum(axis=(1, 2))
+    attacked = (white & black_guard).sum(axis=(1, 2)) - (black & white_guard).sum(axis=(1, 2))
+
+    # files a side has pawns on and the other side does not
+    white_files = white.any(axis=2)
+    black_files = black.any(axis=2)
+    open_files = (white_files & ~black_files).sum(axis=1) - (black_files & ~white_files).sum(axis=1)
+
+    # pawns one step from the last row
+    threats = white[:, :, 1].sum(axis=1) - black[:, :, 6].sum(axis=1)
+
+    return np.stack(
+        [material, advancement, defended, attacked, open_files, threats], axis=1
+    ).astype(np.float64)
+
+
+def evaluate_batch(grids, sides):
+    """Scores for a stack of positions, from each side to move's view."""
+    grids = _as_stack(grids)
+    sides = np.broadcast_to(np.asarray(sides), grids.shape[:1])
+    score = features(grids) @ WEIGHTS
+
+    # the side to move with a pawn on the row before its last wins next move
+    white_wins = (grids[:, :, 1] == PW).any(axis=1) & (sides == PW)
+    black_wins = (grids[:, :, 6] == PB).any(axis=1) & (sides == PB)
+    score = np.where(white_wins, WIN_SCORE, score)
+    score = np.where(black_wins, -WIN_SCORE, score)
+    return score * sides
+
+
+def position_keys(grids, sides):
+    # exact key per position: both occupancy masks and the side to move
+    grids = _as_stack(grids)
+    sides = np.broadcast_to(np.asarray(sides), grids.shape[:1])
+    white = np.packbits((grids == PW).transpose(0, 2, 1).reshape(len(grids), 64), axis=1, bitorder="little")
+    black = np.packbits((grids == PB).transpose(0, 2, 1).reshape(len(grids), 64), axis=1, bitorder="little")
+    white = white.view("<u8").ravel().tolist()
+    black = black.view("<u8").ravel().tolist()
+    return [(w, b, int(s)) for w, b, s in zip(white, black, sides)]
+
+
+class Evaluator:
+    """
+    evaluate_batch behind a bounded LRU cache keyed by position, so
+    positions seen again during search or analysis cost a lookup.
+    """
+
+    def __init__(self, cache_size=1 << 16):
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def evaluate(self, board):
+        # single position from a board.Board, keyed straight from its bitboard
+        key = (board.bits.white, board.bits.black, board.turn)
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        self.misses += 1
+        value = float(evaluate_batch(board.grid, board.turn)[0])
+        self._store(key, value)
+        return value
+
+    def evaluate_many(self, grids, sides):
+        grids = _as_stack(grids)
+        sides = np.broadcast_to(np.asarray(sides), grids.shape[:1])
+        keys = position_keys(grids, sides)
+        scores = np.empty(len(keys))
+
+        # indexes of every uncached position, evaluated once however often
+        # it repeats in the batch
+        missing = {}
+        for i, key in enumerate(keys):
+            value = self.cache.get(key)
+            if value is not None:
+                self.cache.move_to_end(key)
+                scores[i] = value
+            elif key in missing:
+                missing[key].append(i)
+            else:
+                missing[key] = [i]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            # stored by last occurrence, so the LRU order follows the batch
+            order = sorted(missing.values(), key=lambda index: index[-1])
+            first = [index[0] for index in order]
+            computed = evaluate_batch(grids[first], sides[first])
+            for index, value in zip(order, computed.tolist()):
+                scores[index] = value
+                self._store(keys[index[0]], value)
+        return scores
+
+    def _store(self, key, value):
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        self.cache[key] = value
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.cache),
+            "capacity": self.cache_size,
+        }
+
+    def clear(self):
+        self.cache.clear()
+        self.hits = self.misses = 0
@@ -0,0 +1,85 @@
+from array import array
+
+from bitboard import BitBoard, PW, PB
+
+# a ply is packed into 14 bits: from square, to square, a capture flag and
+# the colour of the mover (needed to know which side the capture came from)
+CAPTURE = 1 << 12
+BLACK_MOVER = 1 << 13
+
+
+def pack(fr, to, captured):
+    rec = fr | (to << 6)
+    if captured:
+        rec |= CAPTURE
+        if captured == PW:
+            rec |= BLACK_MOVER
+    return rec
+
+
+def unpack(rec):
+    fr = rec & 63
+    to = (rec >> 6) & 63
+    captured = 0
+    if rec & CAPTURE:
+        captured = PW if rec & BLACK_MOVER else PB
+    return fr, to, captured
+
+
+class MoveLog:
+    """
+    A line of play stored as (from, to, captured) deltas from a start
+    position, two bytes per ply. Every snapshot_every plies the position
+    is also stored so position(n) replays at most snapshot_every deltas.
+    """
+
+    def __init__(self, start=None, snapshot_every=64):
+        self.start = start.copy() if start is not None else BitBoard()
+        self.snapshot_every = snapshot_every
+        self.records = array("H")
+        self.snapshots = array("Q", self.start.key())
+        self.tip = self.start.copy()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, i):
+        return unpack(self.records[i])
+
+    def __iter__(self):
+        for rec in self.records:
+            yield unpack(rec)
+
+    def append(self, fr, to, captured):
+        self.records.append(pack(fr, to, captured))
+        self.tip.make_move(fr, to)
+        if len(self.records) % self.snapshot_every == 0:
+            self.snapshots.extend(self.tip.key())
+
+    def pop(self):
+        fr, to, captured = unpack(self.records.pop())
+        if (len(self.records) + 1) % self.snapshot_every == 0:
+            del self.snapshots[-2:]
+        self.tip.unmake_move(fr, to, captured)
+        return fr, to, captured
+
+    def position(self, n):
+        """Position after the first n plies."""
+        if not 0 <= n <= len(self.records):
+            raise IndexError(f"ply {n} out of range for a {len(self)} ply line")
+
+        if n == len(self.records):
+            return self.tip.copy()
+
+        base = n // self.snapshot_every
+        pos = BitBoard(self.snapshots[2 * base], self.snapshots[2 * base + 1])
+        for i in range(base * self.snapshot_every, n):
+            fr, to, _ = unpack(self.records[i])
+            pos.make_move(fr, to)
+        return pos
+
+    def nbytes(self):
+        return (
+            self.records.itemsize * len(self.records)
+            + self.snapshots.itemsize * len(self.snapshots)
+        )
@@ -0,0 +1,230 @@
+"""
+Opt-in instrumentation for the board and the UI: call counts and latency
+histograms for board operations, per-frame render timings split by draw_*
+method, and event loop lag.
+
+Nothing is measured until enable() is called. It swaps timed wrappers
+in for the methods listed below and disable() puts the originals back,
+so a disabled session runs exactly the uninstrumented code.
+
+    BREAKTHROUGH_PROFILE=1 python main.py           log a line every 10 s
+    BREAKTHROUGH_PROFILE=stats.json python main.py  and write JSON on exit
+"""
+import functools
+import json
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+BOARD_METHODS = ("is_legal", "move", "add_move", "undo", "redo", "seek")
+GAME_METHODS = (
+    "get_coords",
+    "handle_mousedown",
+    "handle_mouseup",
+    "frame_state",
+    "compose",
+    "draw_dirty",
+    "draw",
+    "draw_board",
+    "draw_coordinates",
+    "draw_num_moves",
+    "draw_alternate",
+    "draw_pieces",
+    "draw_held_piece",
+    "draw_to_move",
+    "draw_material",
+    "draw_analysis",
+    "update_analysis",
+    # the dirty rectangle path builds the status texts and composes layers
+    "status_texts",
+    "num_moves_text",
+    "alternate_text",
+    "to_move_text",
+    "material_texts",
+    "analysis_text",
+)
+# layers of Game.compose, recorded under the draw_* name of what they draw
+# so both render paths split a frame the same way
+GAME_LAYERS = {
+    "compose_pieces": "draw_pieces",
+    "compose_texts": "draw_texts",
+}
+
+# bucket k holds latencies below 2**k microseconds
+BUCKETS = 32
+
+
+class Histogram:
+    """Latencies in power of two microsecond buckets."""
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[min(int(seconds * 1e6).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, q):
+        # upper edge of the bucket holding the q quantile, in microseconds
+        target = q * self.count
+        seen = 0
+        for k, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= target:
+                return float(1 << k)
+        return 0.0
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count * 1e6 if self.count else 0.0,
+            "max_us": self.max * 1e6,
+            "p50_us": self.percentile(0.5),
+            "p90_us": self.percentile(0.9),
+            "p99_us": self.percentile(0.99),
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.started = time.perf_counter()
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, seconds):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    def snapshot(self):
+        return {
+            "elapsed": time.perf_counter() - self.started,
+            "counters": dict(self.counters),
+            "histograms": {name: h.summary() for name, h in sorted(self.histograms.items())},
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def log_line(self):
+        # the busiest timings, as 'name count mean/p99' pairs
+        parts = [f"{name}={n}" for name, n in sorted(self.counters.items())]
+        busiest = sorted(self.histograms.items(), key=lambda item: -item[1].total)
+        for name, h in busiest[:8]:
+            s = h.summary()
+            parts.append(f"{name} {s['count']}x {s['mean_us']:.0f}/{s['p99_us']:.0f}us")
+        return ", ".join(parts)
+
+    def frame_split(self, prefix="game."):
+        """
+        (name, calls per frame, microseconds per frame) of every timing
+        under prefix, the most expensive first.
+        """
+        frames = self.counters.get("frames", 0)
+        if not frames:
+            return []
+        split = [
+            (name, h.count / frames, h.total / frames * 1e6)
+            for name, h in self.histograms.items()
+            if name.startswith(prefix)
+        ]
+        return sorted(split, key=lambda row: -row[2])
+
+    def reset(self):
+        self.__init__()
+
+
+metrics = Metrics()
+_patched = []
+
+
+def enabled():
+    return bool(_patched)
+
+
+def _timed(name, fn):
+    perf = time.perf_counter
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = perf()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            metrics.observe(name, perf() - start)
+
+    return wrapper
+
+
+def _timed_render(fn, log_every):
+    # one call per frame, so frame timings and loop lag are measured here
+    perf = time.perf_counter
+    last = None
+    logged = perf()
+
+    @functools.wraps(fn)
+    def render(self):
+        nonlocal last, logged
+        start = perf()
+        if last is not None:
+            interval = start - last
+            metrics.observe("loop.interval", interval)
+            # how far the loop fell behind the frame cap
+            budget = 1 / self.fps if self.fps else 0.0
+            metrics.observe("loop.lag", max(interval - budget, 0.0))
+        last = start
+
+        fn(self)
+        end = perf()
+        metrics.observe("frame.render", end - start)
+        metrics.count("frames")
+        if log_every and end - logged >= log_every:
+            logged = end
+            log.info(metrics.log_line())
+
+    return render
+
+
+def _patch(cls, name, wrapper):
+    _patched.append((cls, name, cls.__dict__[name]))
+    setattr(cls, name, wrapper)
+
+
+def enable(board_cls, game_cls=None, log_every=None):
+    """
+    Start measuring the given Board and Game classes, logging a summary
+    line every log_every seconds of rendering.
+    """
+    if _patched:
+        return
+    for name in BOARD_METHODS:
+        _patch(board_cls, name, _timed(f"board.{name}", getattr(board_cls, name)))
+    if game_cls is not None:
+        for name in GAME_METHODS:
+            _patch(game_cls, name, _timed(f"game.{name}", getattr(game_cls, name)))
+        for name, metric in GAME_LAYERS.items():
+            _patch(game_cls, name, _timed(f"game.{metric}", getattr(game_cls, name)))
+        _patch(game_cls, "render", _timed_render(game_cls.render, log_every))
+    metrics.reset()
+
+
+def disable():
+    while _patched:
+        cls, name, original = _patched.pop()
+        setattr(cls, name, original)
+
+
+def dump(path):
+    with open(path, "w") as f:
+        f.write(metrics.to_json(indent=2))
@@ -1,165 +1,28 @@
-import numpy as np
 import pygame
 from sys import argv
 import time
 import signal
 import os
+import logging
 
-PW = 1
-PB = -1
-
-class Board:
-    def __init__(self):
-
-        self.turn = PW
-        self.history = [np.zeros((8, 8))]
-        self.grid_idx = 0
-        self.alternate_history = None
-        self.alternate_idx = None
-
-        self.grid[:, :2] = PB
-        self.grid[:, -2:] = PW
-        self.over = False
-
-    @property
-    def grid(self):
-        """I'm the 'x' property."""
-        if self.alternate_idx is not None:
-            print("Returning altenate history")
-            return self.alternate_history[self.alternate_idx]
-        return self.history[self.grid_idx]
-
-    def add_move(self):
-        if self.alternate_idx is not None:
-            self.alternate_history.append(self.alternate_history[-1].copy())
-            self.alternate_idx += 1
-        elif self.grid_idx < len(self.history) - 1:
-            self.alternate_history = [self.grid.copy()]
-            self.alternate_idx = 0
-            print("adding to alternate history")
-        else:
-            self.history.append(self.history[-1].copy())
-            self.grid_idx += 1
-
-    def black_material(self):
-        return np.sum(self.grid == PB)
-
-    def white_material(self):
-        return np.sum(self.grid == PW)
-
-    def move(self, f, t):
-
-        if not self.is_legal(f, t):
-            raise Exception(f"Illegal move, at {self.grid_idx}, from {f} to {t}")
-
-        self.add_move()
-        # self.history.append(self.grid.copy())
-        # self.grid_idx += 1
-
-        x1, y1 = f
-        x2, y2 = t
-        
-        curr = self.grid[x1][y1]
-
-        self.grid[x1][y1] = 0
-
-        self.grid[x2][y2] = curr
-
-        if y2 == 0 and curr == PW:
-            self.over = True
-
-        if y2 == 7 and curr == PB:
-            self.over = True
-
-        self.turn *= -1
-
-    def undo(self):
-        if self.alternate_idx is not None:
-            if self.alternate_idx > 0:
-                self.alternate_idx -= 1
-                self.alternate_history.pop()
-            else:
-                self.alternate_idx = None
-                self.alternate_history = None
-            self.turn *= -1
-
-        elif self.grid_idx > 0:
-            self.grid_idx -= 1
-            self.turn *= -1
-
-    def redo(self):
-        if self.alternate_idx is not None:
-            return
-
-        if self.grid_idx < len(self.history) - 1:
-            self.grid_idx += 1
-            self.turn *= -1
-
-    def beginning(self):
-        self.alternate_history = None
-        self.alternate_idx = None
-        self.grid_idx = 0
-        self.turn = PW
-
-    def in_bounds(self, x, y):
-        return 0 <= x < 8 and 0 <= y < 8
-
-
-    def is_legal(self, f, t):
-        if self.over:
-            return False
-
-        x1, y1 = f
-        x2, y2 = t
-
-        # can not move more than 1 cell in x
-        if abs(x1 - x2) > 1:
-            return False
-
-        # needs to be in bounds
-        if not self.in_bounds(x1, y1) or not self.in_bounds(x2, y2):
-            return False
-
-        # can not move empty piece
-        if self.grid[x1][y1] == 0:
-            return False
-
-        # can not kill own piece
-        if abs(x1 - x2) == 1 and self.grid[x2][y2] == self.grid[x1][y1]:
-            return False
-        
-        # cannot capture forward
-        if x1 == x2 and self.grid[x2][y2] != 0:
-            return False
-
-
-        # wite pieces move one forward
-        if self.grid[x1][y1] == PW and y1 != y2 + 1:
-            return False
-
-        # black pieces move one forward
-        if self.grid[x1][y1] == PB and y1 != y2 - 1:
-            return False
-
-        return True
-
-    def in_alternate(self):
-        return self.alternate_idx is not None
-
-    def reset(self):
-        self.__init__()
-
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-DARK_BROWN = (139, 69, 19)
-LIGHT_BROWN = (222, 184, 135)
-SELECTED = (186, 97, 180)
+from bitboard import PW, PB, coords
+from board import Board
+from colors import WHITE, BLACK, DARK_BROWN, LIGHT_BROWN, SELECTED
+from notation import parse_move, format_move
+from search import WIN_BOUND
 
+log = logging.getLogger(__name__)
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, engine=None, engine_side=PB, dirty_rendering=True, fps=60, analyzer=None):
         self.board = Board()
+        # optional computer opponent, anything with choose_move(board)
+        self.engine = engine
+        self.engine_side = engine_side
+        # optional analysis.Analyzer, fed the displayed position every frame
+        self.analyzer = analyzer
+        self.analysis = None
         pygame.init()
         self.screen_width = 800
         self.screen_height = 800
@@ -182,6 +45,29 @@ class Game:
         self.wpawn = self.get_pawn("white")
         self.bpawn = self.get_pawn("black")
 
+        # the dragged piece is drawn slightly larger on a translucent circle
+        held_size = (self.cell_width + 10, self.cell_width + 10)
+        self.wpawn_held = pygame.transform.scale(self.wpawn, held_size)
+        self.bpawn_held = pygame.transform.scale(self.bpawn, held_size)
+        self.selection_circle = pygame.Surface(held_size, pygame.SRCALPHA)
+        pygame.draw.circle(
+            self.selection_circle,
+            SELECTED + (150,),
+            (self.cell_width // 2 + 5, self.cell_width // 2 + 5),
+            self.cell_width // 2 + 5,
+        )
+
+        self.fonts = {}
+        self.text_cache = {}
+        self.background = self.build_background()
+
+        # redraw only what changed instead of the whole window every frame
+        self.dirty_rendering = dirty_rendering
+        self.last_frame = None
+        # frame cap, 0 to run uncapped
+        self.fps = fps
+        self.clock = self.get_clock()
+
         pygame.display.set_caption("Breakthrough")
 
     def get_pawn(self, color):
@@ -190,15 +76,36 @@ class Game:
         pawn = pygame.transform.scale(pawn, (self.cell_width, self.cell_width))
         return pawn
 
-
-    def draw_coordinates(self):
+    def font(self, size):
+        # SysFont searches the system fonts on every call, so load each size once
+        if size not in self.fonts:
+            self.fonts[size] = pygame.font.SysFont("comicsans", size)
+        return self.fonts[size]
+
+    def render_text(self, text, size=40):
+        # text only changes with the game state, so keep the rendered surfaces
+        key = (text, size)
+        if key not in self.text_cache:
+            if len(self.text_cache) > 256:
+                self.text_cache.clear()
+            self.text_cache[key] = self.font(size).render(text, 1, WHITE)
+        return self.text_cache[key]
+
+    def build_background(self):
+        # everything that never changes: backdrop, squares and coordinates
+        background = pygame.Surface((self.screen_width, self.screen_height))
+        background.fill(BLACK)
+        self.draw_board(background)
+        self.draw_coordinates(background)
+        return background
+
+    def draw_coordinates(self, surface=None):
+        surface = surface or self.screen
         # coordinates are like chess
         for i in range(8):
-            text = pygame.font.SysFont("comicsans", 40).render(
-                chr(ord('A') + i), 1, WHITE
-            )
+            text = self.render_text(chr(ord('A') + i))
             # draw below the board
-            self.screen.blit(
+            surface.blit(
                 text,
                 (
                     self.board_start + i * self.cell_width + self.cell_width // 2 - text.get_width() // 2,
@@ -208,11 +115,9 @@ class Game:
 
         # draw the numbers
         for i in range(8):
-            text = pygame.font.SysFont("comicsans", 40).render(
-                str(8 - i), 1, WHITE
-            )
+            text = self.render_text(str(8 - i))
             # draw to the left of the board, 1 on the botton
-            self.screen.blit(
+            surface.blit(
                 text,
                 (
                     self.board_start - text.get_width() - 10,
@@ -222,7 +127,8 @@ class Game:
 
 
 
-    def draw_board(self):
+    def draw_board(self, surface=None):
+        surface = surface or self.screen
         # chessboard pattern with light and dark brown squares
         for i in range(8):
             for j in range(8):
@@ -239,142 +145,130 @@ class Game:
                         (i * self.cell_width, j * self.cell_width, self.cell_width, self.cell_width),
                     )
 
-                # if (i, j) == self.holding_piece:
-                #     # draw small selected circle
-
-                #     s = pygame.Surface((self.cell_width, self.cell_width))
-                #     s.set_alpha(255)
-                #     s.fill(SELECTED)
-                #     self.board_surface.blit(s, (i * self.cell_width, j * self.cell_width))
+        surface.blit(self.board_surface, (self.board_start, self.board_start))
 
-
-
-        self.screen.blit(self.board_surface, (self.board_start, self.board_start))
-
-    def draw_num_moves(self):
-        text = pygame.font.SysFont("comicsans", 40).render(
-            f"Moves: {self.board.grid_idx}", 1, WHITE
+    def num_moves_text(self):
+        text = self.render_text(f"Moves: {self.board.grid_idx}")
+        return text, (
+            self.board_start + self.board_width // 2 - text.get_width() // 2,
+            self.board_start - text.get_height() - 10,
         )
 
-        self.screen.blit(
-            text,
-            (
-                self.board_start + self.board_width // 2 - text.get_width() // 2,
-                self.board_start - text.get_height() - 10,
-            ),
-        )
-
-    def draw_alternate(self):
+    def alternate_text(self):
         # above number of moves, print if we are in alternate history
-        if self.board.in_alternate():
-            text = pygame.font.SysFont("comicsans", 40).render(
-                f"(Alternate history)", 1, WHITE
-            )
-
-            self.screen.blit(
-                text,
-                (
-                    self.board_start + self.board_width // 2 - text.get_width() // 2,
-                    self.board_start - text.get_height() * 2 - 10,
-                ),
-            )
-
-    def draw_pieces(self):
-        # draw the pieces
-        for i in range(8):
-            for j in range(8):
-                if (i, j) == self.holding_piece:
-
-                    #draw transparent circle around mouse
-                    s = pygame.Surface((self.cell_width + 10, self.cell_width + 10), pygame.SRCALPHA)
-
-                    pygame.draw.circle(
-                        s,
-                        SELECTED + (150,),
-                        (self.cell_width // 2 + 5, self.cell_width // 2 + 5),
-                        self.cell_width // 2 + 5,
-                    )
-
-                    self.screen.blit(s, (pygame.mouse.get_pos()[0] - self.cell_width // 2 - 5, pygame.mouse.get_pos()[1] - self.cell_width // 2 - 5))
-
-                    # draw the piece at the mouse position, slightly larger
-                    if self.board.grid[i][j] == PW:
-                        self.screen.blit(
-                            pygame.transform.scale(self.wpawn, (self.cell_width + 10, self.cell_width + 10)),
-                            (pygame.mouse.get_pos()[0] - self.cell_width // 2 - 5, pygame.mouse.get_pos()[1] - self.cell_width // 2 - 5),
-                        )
-
-                    elif self.board.grid[i][j] == PB:
-                        self.screen.blit(
-                            pygame.transform.scale(self.bpawn, (self.cell_width + 10, self.cell_width + 10)),
-                            (pygame.mouse.get_pos()[0] - self.cell_width // 2 - 5, pygame.mouse.get_pos()[1] - self.cell_width // 2 - 5),
-                        )
-
-                elif self.board.grid[i][j] == PW:
-                    self.screen.blit(
-                        self.wpawn,
-                        (self.board_start + i * self.cell_width, self.board_start + j * self.cell_width),
-                    )
-
-                elif self.board.grid[i][j] == PB:
-                    self.screen.blit(
-                        self.bpawn,
-                        ( self.board_start + i * self.cell_width, self.board_start + j * self.cell_width),
-                    )
-
+        text = self.render_text("(Alternate history)")
+        return text, (
+            self.board_start + self.board_width // 2 - text.get_width() // 2,
+            self.board_start - text.get_height() * 2 - 10,
+        )
 
-    def draw_to_move(self):
+    def to_move_text(self):
         # draw who's turn it is
         if self.board.turn == PW:
-            text = pygame.font.SysFont("comicsans", 40).render(
-                f"White to move", 1, WHITE
-            )
+            text = self.render_text("White to move")
         else:
-            text = pygame.font.SysFont("comicsans", 40).render(
-                f"Black to move", 1, WHITE
-            )
-
-        self.screen.blit(
-            text,
-            (
-                self.board_start + self.board_width // 2 - text.get_width() // 2,
-                self.board_start + self.board_height + 50,
-            ),
+            text = self.render_text("Black to move")
+        return text, (
+            self.board_start + self.board_width // 2 - text.get_width() // 2,
+            self.board_start + self.board_height + 50,
         )
 
-    def draw_material(self):
+    def material_texts(self):
         # black material in upper left
         # white material in upper right
-
         font_size = 30
-        # draw black material
-        text = pygame.font.SysFont("comicsans", font_size).render(
-            f"Black material: {self.board.black_material()}", 1, WHITE
-        )
-
-        self.screen.blit(
-            text,
+        black = self.render_text(f"Black material: {self.board.black_material()}", font_size)
+        white = self.render_text(f"White material: {self.board.white_material()}", font_size)
+        return [
+            (black, (self.board_start, self.board_start - black.get_height() - 10)),
             (
-                self.board_start,
-                self.board_start - text.get_height() - 10,
+                white,
+                (
+                    self.board_start + self.board_width - white.get_width(),
+                    self.board_start - white.get_height() - 10,
+                ),
             ),
-        )
+        ]
 
-        # draw white material
-        text = pygame.font.SysFont("comicsans", font_size).render(
-            f"White material: {self.board.white_material()}", 1, WHITE
-        )
+    def analysis_text(self):
+        # evaluation and best line in the top left corner
+        analysis = self.analysis
+        if abs(analysis.score) > WIN_BOUND:
+            score = "white wins" if analysis.score > 0 else "black wins"
+        else:
+            score = f"{analysis.score / 100:+.2f}"
+        line = " ".join(format_move(coords(fr), coords(to)) for fr, to in analysis.pv[:6])
+        text = self.render_text(f"{score} (depth {analysis.depth}) {line}", 22)
+        return text, (10, 5)
+
+    def status_texts(self):
+        # every piece of text that depends on the game state, with its position
+        texts = [self.num_moves_text()]
+        if self.board.in_alternate():
+            texts.append(self.alternate_text())
+        texts.append(self.to_move_text())
+        texts.extend(self.material_texts())
+        if self.analysis is not None:
+            texts.append(self.analysis_text())
+        return texts
 
-        self.screen.blit(
-            text,
-            (
-                self.board_start + self.board_width - text.get_width(),
-                self.board_start - text.get_height() - 10,
-            ),
+    def draw_num_moves(self):
+        self.screen.blit(*self.num_moves_text())
+
+    def draw_alternate(self):
+        if self.board.in_alternate():
+            self.screen.blit(*self.alternate_text())
+
+    def draw_to_move(self):
+        self.screen.blit(*self.to_move_text())
+
+    def draw_material(self):
+        for text, pos in self.material_texts():
+            self.screen.blit(text, pos)
+
+    def draw_analysis(self):
+        if self.analysis is not None:
+            self.screen.blit(*self.analysis_text())
+
+    def held_piece_rect(self):
+        # where the piece being dragged is drawn, centred on the mouse
+        x, y = pygame.mouse.get_pos()
+        size = self.cell_width + 10
+        return pygame.Rect(x - size // 2, y - size // 2, size, size)
+
+    def draw_held_piece(self, piece):
+        rect = self.held_piece_rect()
+
+        #draw transparent circle around mouse
+        self.screen.blit(self.selection_circle, rect)
+
+        # draw the piece at the mouse position, slightly larger
+        if piece == PW:
+            self.screen.blit(self.wpawn_held, rect)
+        elif piece == PB:
+            self.screen.blit(self.bpawn_held, rect)
+
+    def cell_rect(self, i, j):
+        return pygame.Rect(
+            self.board_start + i * self.cell_width,
+            self.board_start + j * self.cell_width,
+            self.cell_width,
+            self.cell_width,
         )
 
+    def draw_pieces(self):
+        # draw the pieces
+        grid = self.board.grid
+        for i in range(8):
+            for j in range(8):
+                if (i, j) == self.holding_piece:
+                    self.draw_held_piece(grid[i][j])
 
+                elif grid[i][j] == PW:
+                    self.screen.blit(self.wpawn, self.cell_rect(i, j))
 
+                elif grid[i][j] == PB:
+                    self.screen.blit(self.bpawn, self.cell_rect(i, j))
 
     def draw(self):
 
@@ -389,6 +283,92 @@ class Game:
         self.draw_pieces()
         self.draw_to_move()
         self.draw_material()
+        self.draw_analysis()
+
+    def frame_state(self):
+        # what is on screen: the piece on every square (the held one lifted
+        # off the board), the status texts and the dragged piece
+        cells = self.board.grid.tolist()
+        held = None
+        if self.holding_piece is not None:
+            i, j = self.holding_piece
+            held = (cells[i][j], self.held_piece_rect())
+            cells[i][j] = 0
+        texts = [(text, text.get_rect(topleft=pos)) for text, pos in self.status_texts()]
+        return cells, texts, held
+
+    def compose(self, rect, state):
+        # repaint one screen region from the background and the frame state
+        cells, texts, held = state
+        self.screen.set_clip(rect)
+        self.screen.blit(self.background, rect, rect)
+        self.compose_pieces(rect, cells)
+        self.compose_texts(rect, texts)
+        if held is not None and rect.colliderect(held[1]):
+            self.draw_held_piece(held[0])
+        self.screen.set_clip(None)
+
+    def compose_pieces(self, rect, cells):
+        for i in range(8):
+            for j in range(8):
+                if cells[i][j] and rect.colliderect(self.cell_rect(i, j)):
+                    self.screen.blit(self.wpawn if cells[i][j] == PW else self.bpawn, self.cell_rect(i, j))
+
+    def compose_texts(self, rect, texts):
+        for text, text_rect in texts:
+            if rect.colliderect(text_rect):
+                self.screen.blit(text, text_rect)
+
+    def draw_dirty(self):
+        """
+        Redraw only the regions that changed since the last call and return
+        them, for pygame.display.update(rects). Nothing changed, nothing drawn.
+        """
+        state = self.frame_state()
+        last = self.last_frame
+        self.last_frame = state
+
+        if last is None:
+            rect = self.screen.get_rect()
+            self.compose(rect, state)
+            return [rect]
+
+        dirty = []
+        for i in range(8):
+            for j in range(8):
+                if state[0][i][j] != last[0][i][j]:
+                    dirty.append(self.cell_rect(i, j))
+
+        old_texts = {(id(text), tuple(rect)) for text, rect in last[1]}
+        new_texts = {(id(text), tuple(rect)) for text, rect in state[1]}
+        for text, rect in last[1] + state[1]:
+            key = (id(text), tuple(rect))
+            if key not in old_texts or key not in new_texts:
+                dirty.append(rect)
+
+        if state[2] != last[2]:
+            for held in (last[2], state[2]):
+                if held is not None:
+                    dirty.append(held[1])
+
+        for rect in dirty:
+            self.compose(rect, state)
+        return dirty
+
+    def update_analysis(self):
+        # hand the displayed position to the analyzer and pick up its results
+        if self.analyzer is None:
+            return
+        self.analyzer.submit_board(self.board)
+        self.analysis = self.analyzer.poll()
+
+    def render(self):
+        self.update_analysis()
+        if self.dirty_rendering:
+            pygame.display.update(self.draw_dirty())
+        else:
+            self.draw()
+            pygame.display.update()
 
     def handle_mouseup(self, pos):
         self.mousedown = False
@@ -404,7 +384,7 @@ class Game:
             return
 
         if self.board.is_legal(self.holding_piece, (x, y)):
-            print("moving")
+            log.debug("moving %s to %s", self.holding_piece, (x, y))
             self.board.move(self.holding_piece, (x, y))
 
         self.holding_piece = None
@@ -424,7 +404,7 @@ class Game:
         if not self.board.in_bounds(x, y):
             return
 
-        if self.board.grid[x][y] == self.board.turn:
+        if self.board.grid[x][y] == self.board.turn and not self.engine_to_move():
             self.holding_piece = (x, y)
 
 
@@ -452,40 +432,42 @@ class Game:
                     if event.key == pygame.K_LEFT:
                         self.board.undo()
 
-            self.draw()
-            pygame.display.update()
+            self.render()
 
-    def get_coords(self, move_str):
-        split_str = 'x' if 'x' in move_str else '-'
-
-        fr, to = move_str.split(split_str)
+            if self.engine_to_move():
+                move = self.engine.choose_move(self.board)
+                if move is not None:
+                    self.board.move(*move)
 
-        fr_x = ord(fr[0]) - ord('a')
-        fr_y = 8 - int(fr[1])
+            self.clock.tick(self.fps)
 
-        to_x = ord(to[0]) - ord('a')
-        to_y = 8 - int(to[1])
+    def engine_to_move(self):
+        # the engine only plays at the end of the line being shown
+        if self.engine is None or self.board.over:
+            return False
+        if self.board.turn != self.engine_side:
+            return False
+        return self.board.in_alternate() or self.board.grid_idx == len(self.board.history)
 
-        return (fr_x, fr_y), (to_x, to_y)
+    def get_coords(self, move_str):
+        return parse_move(move_str)
 
 
     def get_clock(self):
         return pygame.time.Clock()
 
     def play(self, game_str):
-        clock = self.get_clock()
         moves = game_str.split(';')
 
         coords = [self.get_coords(move) for move in moves]
-        print(coords)
+        log.debug("game string moves: %s", coords)
 
         for fr, to in coords:
             self.board.move(fr, to)
 
         self.board.beginning()
 
-        self.draw()
-        pygame.display.update()
+        self.render()
 
         while True:
             for event in pygame.event.get():
@@ -509,26 +491,73 @@ class Game:
                     if event.key == pygame.K_LEFT:
                         self.board.undo()
 
-            self.draw()
-            pygame.display.update()
-            clock.tick(60)
+            self.render()
+            self.clock.tick(self.fps)
 
 if __name__ == "__main__":
+    # BREAKTHROUGH_LOG=debug for the chatty messages
+    logging.basicConfig(
+        level=os.environ.get("BREAKTHROUGH_LOG", "info").upper(),
+        format="%(levelname)s %(name)s: %(message)s",
+    )
+
+    profile = os.environ.get("BREAKTHROUGH_PROFILE")
+    if profile:
+        import atexit
+        import instrument
+
+        instrument.enable(Board, Game, log_every=10.0)
+        if profile != "1":
+            atexit.register(instrument.dump, profile)
 
     def sigint_handler(signal, frame):
-        print('Exiting...')
+        log.info('Exiting...')
+        if profile and profile != "1":
+            instrument.dump(profile)
         os._exit(0) # force exit
 
     signal.signal(signal.SIGINT, sigint_handler)
 
 
-    print(argv)
-    if len(argv) == 2 and argv[1] == 'str':
-        print("Game string mode")
+    log.debug(argv)
+    if len(argv) >= 2 and argv[1] == 'str':
+        # python main.py str [analyze]
+        log.info("Game string mode")
         game_str = input()
-        print(game_str)
-        game = Game()
-        game.play(game_str)
+        log.debug(game_str)
+        if 'analyze' in argv[2:]:
+            from analysis import Analyzer
+
+            with Analyzer() as analyzer:
+                Game(analyzer=analyzer).play(game_str)
+        else:
+            game = Game()
+            game.play(game_str)
+    elif len(argv) >= 2 and argv[1] == 'analyze':
+        # python main.py analyze, two players with live analysis
+        from analysis import Analyzer
+
+        with Analyzer() as analyzer:
+            game = Game(analyzer=analyzer)
+            game.run()
+    elif len(argv) >= 2 and argv[1] == 'ai':
+        # python main.py ai [white|black] [seconds per move]
+        from search import Engine
+
+        side = PW if len(argv) >= 3 and argv[2] == 'white' else PB
+        seconds = float(argv[3]) if len(argv) >= 4 else 1.0
+        game = Game(engine=Engine(time_limit=seconds), engine_side=side)
+        game.run()
+    elif len(argv) >= 2 and argv[1] == 'mcts':
+        # python main.py mcts [white|black] [seconds per move] [workers]
+        from mcts import MCTSPlayer
+
+        side = PW if len(argv) >= 3 and argv[2] == 'white' else PB
+        seconds = float(argv[3]) if len(argv) >= 4 else 1.0
+        workers = int(argv[4]) if len(argv) >= 5 else None
+        with MCTSPlayer(workers=workers, time_limit=seconds) as player:
+            game = Game(engine=player, engine_side=side)
+            game.run()
     else:
         game = Game()
         game.run()
\ No newline at end of file
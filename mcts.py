@@ -0,0 +1,186 @@
+"""
+Monte Carlo tree search player with root parallelism: every worker process
+grows its own tree from the same root for the time budget, and the root
+visit counts are summed to pick the move.
+"""
+import math
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import PW, PB, ROW_0, ROW_7, coords, moves, play, winner
+
+MCTSResult = namedtuple(
+    "MCTSResult", "move stats playouts elapsed workers playouts_per_second"
+)
+
+
+def pack_position(white, black, side):
+    # 17 bytes: both masks and the side to move
+    return (
+        white.to_bytes(8, "little")
+        + black.to_bytes(8, "little")
+        + (b"w" if side == PW else b"b")
+    )
+
+
+def unpack_position(data):
+    white = int.from_bytes(data[:8], "little")
+    black = int.from_bytes(data[8:16], "little")
+    return white, black, PW if data[16:17] == b"w" else PB
+
+
+def rollout(white, black, side, rng):
+    """Play random moves to the end, taking a win when one is on offer."""
+    while True:
+        won = winner(white, black)
+        if won:
+            return won
+        legal = moves(white, black, side)
+        if not legal:
+            return -side
+        goal = ROW_0 if side == PW else ROW_7
+        for fr, to in legal:
+            if (1 << to) & goal:
+                return side
+        fr, to = legal[rng.randrange(len(legal))]
+        white, black = play(white, black, side, fr, to)
+        side = -side
+
+
+class Node:
+    __slots__ = (
+        "white", "black", "side", "move", "parent",
+        "children", "untried", "visits", "wins", "result",
+    )
+
+    def __init__(self, white, black, side, move=None, parent=None):
+        self.white = white
+        self.black = black
+        self.side = side
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.result = winner(white, black)
+        self.untried = [] if self.result else moves(white, black, side)
+        self.visits = 0
+        # wins for the side that moved into this node
+        self.wins = 0.0
+
+    def select(self, exploration):
+        log_n = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda c: c.wins / c.visits + exploration * math.sqrt(log_n / c.visits),
+        )
+
+    def expand(self, rng):
+        fr, to = self.untried.pop(rng.randrange(len(self.untried)))
+        white, black = play(self.white, self.black, self.side, fr, to)
+        child = Node(white, black, -self.side, (fr, to), self)
+        self.children.append(child)
+        return child
+
+
+def grow_tree(white, black, side, time_limit, exploration=1.4, seed=None):
+    """
+    Run MCTS from a position for time_limit seconds. Returns the root move
+    statistics as {(from_sq, to_sq): (visits, wins)} and the playout count.
+    """
+    rng = random.Random(seed)
+    root = Node(white, black, side)
+    deadline = time.perf_counter() + time_limit
+    playouts = 0
+
+    while True:
+        node = root
+        while not node.untried and node.children:
+            node = node.select(exploration)
+        if node.untried:
+            node = node.expand(rng)
+
+        if node.result:
+            won = node.result
+        elif not node.untried and not node.children:
+            # no legal moves, the side to move loses
+            won = -node.side
+        else:
+            won = rollout(node.white, node.black, node.side, rng)
+
+        while node is not None:
+            node.visits += 1
+            if won == -node.side:
+                node.wins += 1
+            node = node.parent
+
+        playouts += 1
+        if not playouts & 63 and time.perf_counter() > deadline:
+            break
+
+    stats = {child.move: (child.visits, child.wins) for child in root.children}
+    return stats, playouts
+
+
+def _grow_packed(data, time_limit, exploration, seed):
+    white, black, side = unpack_position(data)
+    return grow_tree(white, black, side, time_limit, exploration, seed)
+
+
+class MCTSPlayer:
+    def __init__(self, workers=None, time_limit=1.0, exploration=1.4, seed=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def choose_move(self, board):
+        result = self.search(board.bits.white, board.bits.black, board.turn)
+        if result.move is None:
+            return None
+        fr, to = result.move
+        return coords(fr), coords(to)
+
+    def search(self, white, black, side, time_limit=None):
+        time_limit = self.time_limit if time_limit is None else time_limit
+        start = time.perf_counter()
+        seeds = [self.rng.getrandbits(32) for _ in range(self.workers)]
+
+        if self.workers == 1:
+            runs = [grow_tree(white, black, side, time_limit, self.exploration, seeds[0])]
+        else:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers)
+            data = pack_position(white, black, side)
+            futures = [
+                self._pool.submit(_grow_packed, data, time_limit, self.exploration, s)
+                for s in seeds
+            ]
+            runs = [f.result() for f in futures]
+
+        stats = {}
+        playouts = 0
+        for tree_stats, count in runs:
+            playouts += count
+            for move, (visits, wins) in tree_stats.items():
+                v, w = stats.get(move, (0, 0.0))
+                stats[move] = (v + visits, w + wins)
+
+        move = max(stats, key=lambda m: stats[m][0]) if stats else None
+        elapsed = time.perf_counter() - start
+        return MCTSResult(
+            move, stats, playouts, elapsed, self.workers, playouts / elapsed
+        )
@@ -0,0 +1,75 @@
+"""
+Batched legal move generation over stacks of positions.
+
+Grids use the Board.grid layout: shape (N, 8, 8) indexed [n][x][y], with
+PW/PB/0 cells, white moving towards y = 0 and black towards y = 7.
+"""
+import numpy as np
+
+from bitboard import PW, PB
+
+# move kinds along axis 1 of legal_move_mask, as (dx, forward step)
+FORWARD, LEFT, RIGHT = 0, 1, 2
+KIND_DX = np.array([0, -1, 1])
+
+
+def _as_batch(grids, sides):
+    grids = np.asarray(grids)
+    if grids.ndim == 2:
+        grids = grids[None]
+    sides = np.broadcast_to(np.asarray(sides), grids.shape[:1])
+    return grids, sides
+
+
+def is_terminal(grids):
+    # a pawn on its last row or a side without pawns ends the game, like Board.over
+    grids = np.asarray(grids)
+    reached = (grids[:, :, 0] == PW).any(axis=1) | (grids[:, :, 7] == PB).any(axis=1)
+    wiped_out = ~(grids == PW).any(axis=(1, 2)) | ~(grids == PB).any(axis=(1, 2))
+    return reached | wiped_out
+
+
+def legal_move_mask(grids, sides):
+    """
+    (N, 3, 8, 8) bool mask over source squares [n][kind][x][y], true where
+    the pawn of sides[n] on (x, y) can make a move of that kind.
+    """
+    grids, sides = _as_batch(grids, sides)
+    black = (sides == PB)[:, None, None]
+
+    # flip black positions so every side moves towards y = 0
+    flipped = np.where(black, grids[:, :, ::-1], grids)
+    own = flipped == sides[:, None, None]
+    empty = flipped == 0
+
+    mask = np.zeros((len(grids), 3, 8, 8), dtype=bool)
+    mask[:, FORWARD, :, 1:] = own[:, :, 1:] & empty[:, :, :-1]
+    mask[:, LEFT, 1:, 1:] = own[:, 1:, 1:] & ~own[:, :-1, :-1]
+    mask[:, RIGHT, :-1, 1:] = own[:, :-1, 1:] & ~own[:, 1:, :-1]
+
+    mask[is_terminal(grids)] = False
+
+    # undo the flip
+    mask = np.where(black[:, None], mask[:, :, :, ::-1], mask)
+    return mask
+
+
+def legal_moves(grids, sides):
+    """
+    Every legal move for a stack of positions.
+
+    Returns (index, fr, to): index[m] is the position move m belongs to,
+    fr and to are (M, 2) int arrays of (x, y) squares, grouped by position.
+    """
+    grids, sides = _as_batch(grids, sides)
+    mask = legal_move_mask(grids, sides)
+
+    index, kind, x, y = np.nonzero(mask)
+    fr = np.stack([x, y], axis=1)
+    to = np.stack([x + KIND_DX[kind], y - sides[index]], axis=1)
+    return index, fr, to
+
+
+def count_moves(grids, sides):
+    # number of legal moves per position
+    return legal_move_mask(grids, sides).sum(axis=(1, 2, 3))
@@ -0,0 +1,29 @@
+"""
+Game string notation: moves like 'a2-a3' or 'b7xa6' separated by ';'.
+Files a-h map to x 0-7 and ranks 8-1 to y 0-7, as in Board.grid.
+"""
+
+
+def parse_move(move_str):
+    split_str = 'x' if 'x' in move_str else '-'
+
+    fr, to = move_str.split(split_str)
+
+    fr_x = ord(fr[0]) - ord('a')
+    fr_y = 8 - int(fr[1])
+
+    to_x = ord(to[0]) - ord('a')
+    to_y = 8 - int(to[1])
+
+    return (fr_x, fr_y), (to_x, to_y)
+
+
+def split_game(game_str):
+    # individual move strings, ignoring blanks and a trailing ';'
+    return [move.strip() for move in game_str.strip().split(';') if move.strip()]
+
+
+def format_move(f, t, capture=False):
+    (fr_x, fr_y), (to_x, to_y) = f, t
+    sep = 'x' if capture else '-'
+    return f"{chr(ord('a') + fr_x)}{8 - fr_y}{sep}{chr(ord('a') + to_x)}{8 - to_y}"
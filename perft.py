@@ -0,0 +1,185 @@
+"""
+Perft: count the leaf nodes of the game tree to a fixed depth, to check
+and benchmark move generation.
+
+    python perft.py [depth] [board|bits|batch]   start position
+    python perft.py divide [depth] [position]    leaf count per root move
+    python perft.py check [board|bits|batch]     compare with REFERENCE
+
+Three move generators are counted the same way: make/unmake on Board,
+raw bitboard ints, and breadth-first expansion with movegen over the
+whole frontier. Positions where the game is over have no moves.
+"""
+import sys
+import time
+
+import numpy as np
+
+from bitboard import coords, moves, play, winner
+from board import Board
+from movegen import legal_moves
+from notation import parse_move, split_game, format_move
+
+# positions as the game strings that lead to them, from random games
+POSITIONS = {
+    "start": "",
+    "opening": "h2-g3;c7-d6;g2-f3;d6-c5;h1-g2;a7-b6;e2-e3;g7-g6;f3-g4;e7-d6",
+    "middlegame": (
+        "h2-g3;d7-c6;g2-f3;c7-d6;e2-e3;c6-b5;e1-e2;a7-b6;e3-d4;h7-g6;d4-d5;"
+        "b7-c6;a2-a3;f7-e6;a3-b4;e6xd5;c2-b3;h8-h7;g3-h4;b6-a5;b3-a4;e7-f6;"
+        "g1-g2;b5-c4;h1-h2;b8-b7;f3-f4;h7-h6;f4-e5;c6-c5"
+    ),
+    "endgame": (
+        "g2-f3;d7-d6;d2-d3;h7-h6;c1-d2;b7-b6;d3-d4;d8-d7;e2-d3;d6-c5;h2-h3;"
+        "c7-d6;f1-e2;g7-g6;c2-b3;b6-a5;g1-g2;a7-b6;b1-c2;h8-h7;h3-g4;b8-c7;"
+        "d3-c4;e7-e6;g4-f5;d7-c6;d2-d3;a8-a7;d1-d2;c5xd4;d3-e4;h6-h5;f5-f6;"
+        "d6-d5;c2-c3;e8-d7;e4-f5;b6-c5;c4xd5;h7-h6;b3-b4;g6-g5;d2-d3;g5-f4;"
+        "f6-e7;g8-g7;d3-e4;f4-e3;h1-h2;e3xf2;e2-e3;c7-b6;f5-f6;d7-d6;e4-e5;"
+        "h5-h4;e1-d2;c8-d7;d2-d3;a7-a6;f6xg7"
+    ),
+    # white to move with a pawn one step from the last row
+    "win in one": (
+        "a2-b3;d7-e6;f2-f3;g7-f6;g2-g3;c7-d6;d2-d3;d8-c7;a1-a2;b7-c6;h2-h3;"
+        "d6-e5;c2-c3;f6-f5;h1-h2;a7-b6;f1-g2;h8-g7;h3-g4;f5-e4;c3-c4;h7-g6;"
+        "g4-g5;b6-b5;f3-f4;b8-b7;d1-c2;c7-b6;e2-e3;b5xc4;g2-h3;e6-d5;g1-g2;"
+        "b6-a5;d3xe4;g6-f5;f4xe5;c6-b5;a2-a3;f7-g6;b3-b4;e7-e6;g5-f6;b5-a4;"
+        "e1-d2;g7-h6;b4-c5;e8-f7;h3-h4;c4-c3;f6-e7;h6-h5;b2xc3;a8-a7;c3-c4;"
+        "f8xe7;c2-b3;g8-h7;c5-b6;a7-a6;b3-b4;f5-f4;b4xa5;c8-d7;c1-b2;f4xg3;"
+        "b6-a7;f7-f6"
+    ),
+}
+
+# leaf counts by depth, starting at depth 1
+REFERENCE = {
+    "start": [22, 484, 11132, 256036],
+    "opening": [25, 699, 18160, 516956],
+    "middlegame": [31, 1015, 30529, 966310],
+    "endgame": [24, 630, 12507, 308477],
+    "win in one": [24, 434, 10379, 189572],
+}
+
+
+def board_at(name):
+    board = Board()
+    for move_str in split_game(POSITIONS[name]):
+        board.move(*parse_move(move_str))
+    return board
+
+
+def perft_board(board, depth, side=None):
+    # make/unmake on a Board, leaving its history alone
+    side = board.turn if side is None else side
+    if depth == 0:
+        return 1
+    if board.over:
+        return 0
+    legal = board.bits.legal_moves(side)
+    if depth == 1:
+        return len(legal)
+    nodes = 0
+    for fr, to in legal:
+        captured = board.make(fr, to)
+        nodes += perft_board(board, depth - 1, -side)
+        board.unmake(fr, to, captured)
+    return nodes
+
+
+def perft_bits(white, black, side, depth):
+    if depth == 0:
+        return 1
+    if winner(white, black):
+        return 0
+    legal = moves(white, black, side)
+    if depth == 1:
+        return len(legal)
+    nodes = 0
+    for fr, to in legal:
+        w, b = play(white, black, side, fr, to)
+        nodes += perft_bits(w, b, -side, depth - 1)
+    return nodes
+
+
+def perft_batch(grid, side, depth):
+    # expand the whole frontier one ply at a time
+    grids = np.asarray(grid, dtype=np.int8)[None]
+    sides = np.array([side], dtype=np.int8)
+    for _ in range(depth):
+        index, fr, to = legal_moves(grids, sides)
+        grids = grids[index]
+        n = np.arange(len(index))
+        grids[n, to[:, 0], to[:, 1]] = grids[n, fr[:, 0], fr[:, 1]]
+        grids[n, fr[:, 0], fr[:, 1]] = 0
+        sides = -sides[index]
+    return len(grids)
+
+
+def perft(board, depth, backend="board"):
+    if backend == "board":
+        return perft_board(board, depth)
+    if backend == "bits":
+        return perft_bits(board.bits.white, board.bits.black, board.turn, depth)
+    if backend == "batch":
+        return perft_batch(board.grid, board.turn, depth)
+    raise ValueError(f"unknown backend {backend!r}")
+
+
+def divide(board, depth, backend="board"):
+    """Leaf count below each root move, as {move string: nodes}."""
+    counts = {}
+    side = board.turn
+    for fr, to in board.bits.legal_moves(side):
+        captured = board.make(fr, to)
+        board.turn = -side
+        name = format_move(coords(fr), coords(to), captured != 0)
+        counts[name] = perft(board, depth - 1, backend) if depth > 1 else 1
+        board.turn = side
+        board.unmake(fr, to, captured)
+    return counts
+
+
+def timed_perft(board, depth, backend):
+    start = time.perf_counter()
+    nodes = perft(board, depth, backend)
+    return nodes, time.perf_counter() - start
+
+
+def check(backend="board"):
+    # compare every reference count, returns the number of mismatches
+    failures = 0
+    for name, counts in REFERENCE.items():
+        board = board_at(name)
+        for depth, expected in enumerate(counts, 1):
+            nodes, elapsed = timed_perft(board, depth, backend)
+            ok = nodes == expected
+            failures += not ok
+            print(
+                f"{'ok  ' if ok else 'FAIL'} {name:12s} depth {depth}  {nodes:10d}"
+                f" (expected {expected})  {nodes / max(elapsed, 1e-9):10.0f} nodes/s"
+            )
+    return failures
+
+
+def main(args):
+    if args and args[0] == "check":
+        failures = check(args[1] if len(args) > 1 else "board")
+        sys.exit(1 if failures else 0)
+
+    if args and args[0] == "divide":
+        depth = int(args[1]) if len(args) > 1 else 3
+        name = args[2] if len(args) > 2 else "start"
+        counts = divide(board_at(name), depth)
+        for move, nodes in counts.items():
+            print(f"{move}: {nodes}")
+        print(f"total: {sum(counts.values())}")
+        return
+
+    depth = int(args[0]) if args else 4
+    backend = args[1] if len(args) > 1 else "board"
+    board = board_at("start")
+    for d in range(1, depth + 1):
+        nodes, elapsed = timed_perft(board, d, backend)
+        print(f"depth {d}  {nodes:10d} nodes  {elapsed:8.3f} s  {nodes / max(elapsed, 1e-9):10.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
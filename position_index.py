@@ -0,0 +1,311 @@
+"""
+On-disk index from position to the games that reached it, built from game
+archives (see archive.py) in one replay.
+
+Every position of every game is one posting: the Zobrist key of the
+position (zobrist.zobrist_hash, side to move included), the game id, the
+ply, the move played from it (NO_MOVE after the last one) and the game's
+winner. Postings are written in segments sorted by key, as two .npy
+files per segment, so a query is a binary search in each memory-mapped
+segment. Appending an archive only writes new segments; game ids carry on
+from the games already indexed. index.json lists the segments and which
+archive every range of game ids came from.
+
+    python position_index.py build index_dir games.bga [more.bga ...]
+    python position_index.py append index_dir more.bga
+    python position_index.py query index_dir "a2-a3;b7-b6"
+    python position_index.py compact index_dir
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from archive import ArchiveReader, decode_move, GAME_HEADER
+from bitboard import PW, PB, START_WHITE, START_BLACK, square, coords, play
+from notation import parse_move, split_game, format_move
+from zobrist import ZOBRIST_WHITE, ZOBRIST_BLACK, ZOBRIST_BLACK_TO_MOVE, zobrist_hash
+
+VERSION = 1
+MANIFEST = "index.json"
+POSTING = np.dtype([("game", "<u4"), ("ply", "<u2"), ("move", "u1"), ("winner", "i1")])
+# move byte of a game's final position
+NO_MOVE = 255
+
+Z_WHITE = np.array(ZOBRIST_WHITE, dtype=np.uint64)
+Z_BLACK = np.array(ZOBRIST_BLACK, dtype=np.uint64)
+Z_SIDE = np.uint64(ZOBRIST_BLACK_TO_MOVE)
+START_KEY = zobrist_hash(START_WHITE, START_BLACK, PW)
+
+ONE = np.uint64(1)
+# to square minus from square by direction, as in archive.decode_move
+STEPS = {PW: np.array([-8, -9, -7]), PB: np.array([8, 7, 9])}
+
+
+def read_games(reader, start, stop):
+    """
+    Games start..stop of an archive as a (G, max plies) uint8 array of move
+    bytes padded with NO_MOVE, with the ply count and winner of each game.
+    """
+    buf = np.frombuffer(reader.mm, dtype=np.uint8)
+    offsets = np.asarray(reader.index[start:stop], dtype=np.int64)
+    plies = buf[offsets].astype(np.int64) | (buf[offsets + 1].astype(np.int64) << 8)
+    winners = buf[offsets + 2].view(np.int8)
+    width = int(plies.max()) if len(plies) else 0
+    cols = np.arange(width)
+    valid = cols[None, :] < plies[:, None]
+    index = np.where(valid, offsets[:, None] + GAME_HEADER.size + cols[None, :], 0)
+    moves = np.where(valid, buf[index], NO_MOVE).astype(np.uint8)
+    return moves, plies, winners
+
+
+def game_postings(moves, plies, winners, first_game):
+    """
+    Replay a batch of games side by side, one ply at a time for all of
+    them, and return (keys, postings) for every position reached.
+    """
+    n = len(plies)
+    white = np.full(n, START_WHITE, dtype=np.uint64)
+    black = np.full(n, START_BLACK, dtype=np.uint64)
+    key = np.full(n, START_KEY, dtype=np.uint64)
+    games = np.arange(first_game, first_game + n, dtype=np.uint32)
+
+    keys, postings = [], []
+    for ply in range(moves.shape[1] + 1):
+        live = plies >= ply
+        if not live.any():
+            break
+        live_index = np.nonzero(live)[0]
+        record = np.empty(len(live_index), dtype=POSTING)
+        record["game"] = games[live_index]
+        record["ply"] = ply
+        record["move"] = moves[live_index, ply] if ply < moves.shape[1] else NO_MOVE
+        record["winner"] = winners[live_index]
+        keys.append(key[live_index])
+        postings.append(record)
+
+        # play the move of every game that has one
+        moving = live_index[plies[live_index] > ply]
+        if not len(moving):
+            break
+        byte = moves[moving, ply].astype(np.int64)
+        side = PW if ply % 2 == 0 else PB
+        fr = byte & 63
+        to = fr + STEPS[side][byte >> 6]
+        src = ONE << fr.astype(np.uint64)
+        dst = ONE << to.astype(np.uint64)
+        if side == PW:
+            taken = (black[moving] & dst) != 0
+            key[moving] ^= Z_WHITE[fr] ^ Z_WHITE[to] ^ Z_SIDE ^ np.where(taken, Z_BLACK[to], np.uint64(0))
+            white[moving] ^= src | dst
+            black[moving] &= ~dst
+        else:
+            taken = (white[moving] & dst) != 0
+            key[moving] ^= Z_BLACK[fr] ^ Z_BLACK[to] ^ Z_SIDE ^ np.where(taken, Z_WHITE[to], np.uint64(0))
+            black[moving] ^= src | dst
+            white[moving] &= ~dst
+
+    return np.concatenate(keys), np.concatenate(postings)
+
+
+class PositionIndex:
+    def __init__(self, directory):
+        self.directory = directory
+        path = os.path.join(directory, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+            if self.manifest["version"] != VERSION:
+                raise ValueError(f"unsupported index version {self.manifest['version']}")
+        else:
+            self.manifest = {"version": VERSION, "games": 0, "segments": [], "sources": []}
+        self._segments = None
+
+    def __len__(self):
+        return self.manifest["games"]
+
+    def postings_count(self):
+        return sum(seg["postings"] for seg in self.manifest["segments"])
+
+    def _path(self, name, part):
+        return os.path.join(self.directory, f"{name}.{part}.npy")
+
+    def segments(self):
+        # (keys, postings) of every segment, memory-mapped on first use
+        if self._segments is None:
+            self._segments = [
+                (
+                    np.load(self._path(seg["name"], "keys"), mmap_mode="r"),
+                    np.load(self._path(seg["name"], "postings"), mmap_mode="r"),
+                )
+                for seg in self.manifest["segments"]
+            ]
+        return self._segments
+
+    def _save_manifest(self):
+        # write then rename, so a crash never leaves a half written manifest
+        path = os.path.join(self.directory, MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(path + ".tmp", path)
+        self._segments = None
+
+    def _write_segment(self, keys, postings):
+        order = np.argsort(keys, kind="stable")
+        number = max((int(seg["name"][4:]) for seg in self.manifest["segments"]), default=-1) + 1
+        name = f"seg_{number:05d}"
+        np.save(self._path(name, "keys"), keys[order])
+        np.save(self._path(name, "postings"), postings[order])
+        return {"name": name, "postings": len(keys)}
+
+    def append(self, archive_path, batch=50_000, segment_size=1 << 24, log=None):
+        """
+        Index every game of an archive after the games already indexed.
+        Postings are buffered up to segment_size before a sorted segment
+        is written, which bounds memory whatever the archive size.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        first_game = self.manifest["games"]
+        new_segments = []
+        buffered, size = [], 0
+        start = time.perf_counter()
+
+        def flush():
+            nonlocal buffered, size
+            if buffered:
+                keys = np.concatenate([k for k, _ in buffered])
+                postings = np.concatenate([p for _, p in buffered])
+                segment = self._write_segment(keys, postings)
+                self.manifest["segments"].append(segment)
+                new_segments.append(segment)
+            buffered, size = [], 0
+
+        with ArchiveReader(archive_path) as reader:
+            count = len(reader)
+            for lo in range(0, count, batch):
+                hi = min(lo + batch, count)
+                moves, plies, winners = read_games(reader, lo, hi)
+                keys, postings = game_postings(moves, plies, winners, first_game + lo)
+                buffered.append((keys, postings))
+                size += len(keys)
+                if size >= segment_size:
+                    flush()
+                if log:
+                    elapsed = time.perf_counter() - start
+                    log(f"{hi}/{count} games, {hi / elapsed:.0f} games/s")
+            flush()
+
+        self.manifest["games"] += count
+        self.manifest["sources"].append(
+            {"path": os.path.abspath(archive_path), "first_game": first_game, "games": count}
+        )
+        self._save_manifest()
+        return new_segments
+
+    def compact(self):
+        # merge every segment into one, for fewer binary searches per query
+        segments = self.manifest["segments"]
+        if len(segments) <= 1:
+            return
+        keys = np.concatenate([np.load(self._path(s["name"], "keys")) for s in segments])
+        postings = np.concatenate([np.load(self._path(s["name"], "postings")) for s in segments])
+        merged = self._write_segment(keys, postings)
+        self.manifest["segments"] = [merged]
+        self._save_manifest()
+        for seg in segments:
+            os.remove(self._path(seg["name"], "keys"))
+            os.remove(self._path(seg["name"], "postings"))
+
+    def lookup(self, white, black, side):
+        """Postings of every game that reached a position, by game and ply."""
+        key = np.uint64(zobrist_hash(white, black, side))
+        found = []
+        for keys, postings in self.segments():
+            lo = np.searchsorted(keys, key, "left")
+            hi = np.searchsorted(keys, key, "right")
+            if hi > lo:
+                found.append(np.asarray(postings[lo:hi]))
+        if not found:
+            return np.empty(0, dtype=POSTING)
+        return np.concatenate(found)
+
+    def lookup_board(self, board):
+        return self.lookup(board.bits.white, board.bits.black, board.turn)
+
+    def source(self, game):
+        # (archive path, game number in that archive) of a game id
+        for src in self.manifest["sources"]:
+            if src["first_game"] <= game < src["first_game"] + src["games"]:
+                return src["path"], game - src["first_game"]
+        raise IndexError(f"no game {game} in the index")
+
+    def move_stats(self, white, black, side):
+        """
+        Moves played from a position, most played first, as
+        (move string, games, wins for the mover, score for the mover).
+        """
+        postings = self.lookup(white, black, side)
+        moves, winners = postings["move"], postings["winner"]
+        # one pass over the postings, counted per move byte
+        games = np.bincount(moves, minlength=256)
+        wins = np.bincount(moves[winners == side], minlength=256)
+        losses = np.bincount(moves[winners == -side], minlength=256)
+        stats = []
+        for byte in np.nonzero(games[:NO_MOVE])[0].tolist():
+            fr, to = decode_move(byte, 0 if side == PW else 1)
+            capture = bool((white | black) & (1 << to))
+            n, won, lost = int(games[byte]), int(wins[byte]), int(losses[byte])
+            score = (won + (n - won - lost) / 2) / n
+            stats.append((format_move(coords(fr), coords(to), capture), n, won, score))
+        stats.sort(key=lambda s: -s[1])
+        return stats
+
+
+def position_after(game_str):
+    # (white, black, side) after the moves of a game string
+    white, black, side = START_WHITE, START_BLACK, PW
+    for move_str in split_game(game_str):
+        f, t = parse_move(move_str)
+        white, black = play(white, black, side, square(*f), square(*t))
+        side = -side
+    return white, black, side
+
+
+def main(args):
+    command, directory = args[0], args[1]
+    index = PositionIndex(directory)
+
+    if command in ("build", "append"):
+        if command == "build" and len(index):
+            sys.exit(f"{directory} already holds an index, use append")
+        for path in args[2:]:
+            start = time.perf_counter()
+            index.append(path, log=print)
+            print(f"indexed {path} in {time.perf_counter() - start:.1f} s")
+        print(f"{len(index)} games, {index.postings_count()} positions")
+
+    elif command == "compact":
+        index.compact()
+        print(f"{len(index.manifest['segments'])} segment, {index.postings_count()} positions")
+
+    elif command == "query":
+        position = position_after(args[2] if len(args) > 2 else "")
+        start = time.perf_counter()
+        postings = index.lookup(*position)
+        stats = index.move_stats(*position)
+        elapsed = time.perf_counter() - start
+        print(f"{len(postings)} games reached the position ({elapsed * 1000:.2f} ms)")
+        for game, ply in postings[["game", "ply"]][:10].tolist():
+            path, k = index.source(game)
+            print(f"  game {k} of {path}, ply {ply}")
+        for move, games, wins, score in stats:
+            print(f"  {move}  {games} games  {wins} won  score {score:.1%}")
+
+    else:
+        sys.exit(f"unknown command {command!r}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
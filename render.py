@@ -0,0 +1,265 @@
+"""
+Headless rendering of positions and games to PNG, on SDL's dummy video
+driver so no display is needed.
+
+    python render.py thumbs games.txt out_dir [size] [workers]
+    python render.py frames games.txt out_dir [size] [workers]
+    python render.py gif games.txt out_dir [size] [workers]
+
+games.txt holds one game string per line. thumbs writes the final
+position of every game as game_NNNNN.png, frames writes every position
+of every game as game_NNNNN/ply_NNN.png and gif writes one animated
+game_NNNNN.gif per game, which needs Pillow. size is the side of the
+images in pixels. Games that do not replay as legal games are skipped
+and counted. Throughput is reported on stderr.
+
+Everything that does not depend on the position (board squares,
+coordinates, scaled sprites, the last move highlight and the digits of
+the ply counter) is prepared once per size and process, so an image
+costs a copy of the background, a blit per pawn and the PNG encoding.
+"""
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from bitboard import bits, coords
+from board import Board
+from colors import WHITE, BLACK, DARK_BROWN, LIGHT_BROWN, SELECTED
+from notation import parse_move, split_game
+from replay import replay_game
+
+ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+_sprites = {}
+_renderers = {}
+
+
+def _init():
+    # a 1x1 dummy display, so surfaces can be converted to its pixel format
+    if not pygame.display.get_init() or pygame.display.get_surface() is None:
+        pygame.display.init()
+        pygame.font.init()
+        pygame.display.set_mode((1, 1))
+
+
+def _sprite(color):
+    # the full size sprite, decoded once per process
+    if color not in _sprites:
+        _sprites[color] = pygame.image.load(os.path.join(ASSETS, f"pawn_{color}.png")).convert_alpha()
+    return _sprites[color]
+
+
+class Renderer:
+    """Draws positions as size x size surfaces, optionally with coordinates."""
+
+    def __init__(self, size=256, coordinates=True):
+        _init()
+        self.size = size
+        self.coordinates = coordinates
+        # room around the board for the coordinates and the ply counter
+        margin = size // 12 if coordinates else 0
+        self.cell = (size - 2 * margin) // 8
+        self.offset = (size - 8 * self.cell) // 2
+
+        self.wpawn = pygame.transform.smoothscale(_sprite("white"), (self.cell, self.cell))
+        self.bpawn = pygame.transform.smoothscale(_sprite("black"), (self.cell, self.cell))
+        self.highlight = pygame.Surface((self.cell, self.cell), pygame.SRCALPHA)
+        self.highlight.fill(SELECTED + (150,))
+
+        self.glyphs = {}
+        self.font = pygame.font.SysFont("comicsans", max(margin * 4 // 5, 8)) if coordinates else None
+        self.background = self.build_background()
+        # top left corner of every square
+        self.corners = [self.cell_corner(*coords(sq)) for sq in range(64)]
+
+    def glyph(self, char):
+        if char not in self.glyphs:
+            self.glyphs[char] = self.font.render(char, True, WHITE).convert_alpha()
+        return self.glyphs[char]
+
+    def cell_corner(self, x, y):
+        return self.offset + x * self.cell, self.offset + y * self.cell
+
+    def build_background(self):
+        background = pygame.Surface((self.size, self.size)).convert()
+        background.fill(BLACK)
+        for x in range(8):
+            for y in range(8):
+                color = LIGHT_BROWN if (x + y) % 2 == 0 else DARK_BROWN
+                background.fill(color, (*self.cell_corner(x, y), self.cell, self.cell))
+        if self.coordinates:
+            bottom = self.offset + 8 * self.cell
+            for i in range(8):
+                # files below the board, ranks to the left, 1 at the bottom
+                text = self.glyph(chr(ord("A") + i))
+                left, top = self.cell_corner(i, 0)
+                background.blit(text, (left + (self.cell - text.get_width()) // 2,
+                                       bottom + (self.offset - text.get_height()) // 2))
+                text = self.glyph(str(8 - i))
+                left, top = self.cell_corner(0, i)
+                background.blit(text, ((self.offset - text.get_width()) // 2,
+                                       top + (self.cell - text.get_height()) // 2))
+        return background
+
+    def draw_ply(self, surface, ply):
+        # centred above the board, drawn digit by digit from the glyph cache
+        digits = [self.glyph(c) for c in str(ply)]
+        width = sum(d.get_width() for d in digits)
+        left = (self.size - width) // 2
+        for d in digits:
+            surface.blit(d, (left, (self.offset - d.get_height()) // 2))
+            left += d.get_width()
+
+    def position(self, white, black, last=None, ply=None):
+        """
+        A position as a new surface. last is the (from, to) squares of
+        the move that led to it, highlighted, and ply is shown above the
+        board when there are coordinates.
+        """
+        surface = self.background.copy()
+        if last is not None:
+            for sq in last:
+                surface.blit(self.highlight, self.corners[sq])
+        corners = self.corners
+        surface.blits([(self.wpawn, corners[sq]) for sq in bits(white)], doreturn=False)
+        surface.blits([(self.bpawn, corners[sq]) for sq in bits(black)], doreturn=False)
+        if ply is not None and self.coordinates:
+            self.draw_ply(surface, ply)
+        return surface
+
+    def board(self, board):
+        # the displayed position of a Board, alternate line included
+        last = None
+        if board.alternate_idx is not None and len(board.alternate_history):
+            last = board.alternate_history[len(board.alternate_history) - 1][:2]
+        elif board.alternate_idx is None and board.grid_idx > 0:
+            last = board.history[board.grid_idx - 1][:2]
+        plies = board.grid_idx + (board.alternate_idx + 1 if board.alternate_idx is not None else 0)
+        return self.position(board.bits.white, board.bits.black, last, plies)
+
+    def game(self, game_str):
+        """Every position of a game, start included, as surfaces."""
+        board = Board()
+        yield self.board(board)
+        for move_str in split_game(game_str):
+            board.move(*parse_move(move_str))
+            yield self.board(board)
+
+
+def renderer(size=256, coordinates=True):
+    # one Renderer per size and process, built on first use
+    key = (size, coordinates)
+    if key not in _renderers:
+        _renderers[key] = Renderer(size, coordinates)
+    return _renderers[key]
+
+
+def save_png(surface, path):
+    pygame.image.save(surface, path)
+
+
+def save_gif(surfaces, path, frame_ms=500):
+    # pygame writes no GIFs, so this one needs Pillow
+    from PIL import Image
+
+    frames = [
+        Image.frombytes("RGB", s.get_size(), pygame.image.tobytes(s, "RGB")).quantize()
+        for s in surfaces
+    ]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=frame_ms, loop=0)
+
+
+def render_game(kind, n, game_str, out_dir, size=256):
+    """
+    Write the images of game number n, returns how many were written,
+    None if the game is not valid.
+    """
+    # checked by replaying it, which leaves the board at the final position
+    board = Board()
+    if replay_game(game_str, board).illegal_ply is not None:
+        return None
+    r = renderer(size)
+    name = os.path.join(out_dir, f"game_{n:05d}")
+    if kind == "thumbs":
+        save_png(r.board(board), name + ".png")
+        return 1
+    if kind == "frames":
+        os.makedirs(name, exist_ok=True)
+        count = 0
+        for ply, surface in enumerate(r.game(game_str)):
+            save_png(surface, os.path.join(name, f"ply_{ply:03d}.png"))
+            count += 1
+        return count
+    if kind == "gif":
+        surfaces = list(r.game(game_str))
+        save_gif(surfaces, name + ".gif")
+        return len(surfaces)
+    raise ValueError(f"unknown kind {kind!r}")
+
+
+def render_chunk(kind, chunk, out_dir, size):
+    # chunk is a list of (game number, game string), rendered in a worker;
+    # returns (images written, games skipped as invalid)
+    images = skipped = 0
+    for n, game_str in chunk:
+        count = render_game(kind, n, game_str, out_dir, size)
+        if count is None:
+            skipped += 1
+        else:
+            images += count
+    return images, skipped
+
+
+def render_games(kind, games, out_dir, size=256, workers=1, chunk_size=20):
+    """
+    Render (game number, game string) pairs, over a process pool with a
+    bounded number of chunks in flight when workers > 1. Yields (images
+    written, games skipped as invalid) per chunk.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    chunks = [games[i:i + chunk_size] for i in range(0, len(games), chunk_size)]
+    if workers <= 1:
+        for chunk in chunks:
+            yield render_chunk(kind, chunk, out_dir, size)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(render_chunk, kind, chunk, out_dir, size))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(args):
+    kind, path, out_dir = args[0], args[1], args[2]
+    size = int(args[3]) if len(args) > 3 else 256
+    workers = int(args[4]) if len(args) > 4 else os.cpu_count() or 1
+
+    with open(path) as f:
+        games = [(n, line.strip()) for n, line in enumerate(f) if line.strip()]
+
+    images = skipped = 0
+    start = time.perf_counter()
+    for count, invalid in render_games(kind, games, out_dir, size, workers):
+        images += count
+        skipped += invalid
+    elapsed = time.perf_counter() - start
+    print(
+        f"{len(games)} games, {skipped} invalid skipped, {images} images of {size}x{size} in {elapsed:.2f} s,"
+        f" {images / elapsed if elapsed else 0:.0f} images/s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,143 @@
+"""
+Headless replay and validation of game strings, one game per line.
+
+    python replay.py [file|-] [workers] > results.jsonl
+
+Every game is replayed through Board and one JSON line is written per
+game with its winner, the number of legal plies and the first illegal
+move, if any. Throughput is reported on stderr.
+"""
+import json
+import os
+import sys
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import PW, PB
+from board import Board
+from notation import parse_move, split_game
+
+GameResult = namedtuple("GameResult", "winner plies illegal_ply illegal_move error")
+
+WINNER_NAMES = {PW: "white", PB: "black", 0: None}
+
+
+def replay_game(game_str, board=None):
+    """
+    Replay one game string. Moves must alternate starting with white and
+    stop once a pawn reaches its last row, and captures are written with
+    'x'. The first move that breaks the rules, cannot be parsed or marks a
+    capture wrongly ends the replay.
+    """
+    board = board or Board()
+    plies = 0
+    for move_str in split_game(game_str):
+        try:
+            f, t = parse_move(move_str)
+        except (ValueError, IndexError):
+            return GameResult(0, plies, plies, move_str, "unparseable move")
+
+        x, y = f
+        if not board.in_bounds(x, y) or board.bits.piece_at(x, y) != board.turn:
+            return GameResult(0, plies, plies, move_str, "not the side to move")
+        if not board.is_legal(f, t):
+            error = "move after the game ended" if board.over else "illegal move"
+            return GameResult(0, plies, plies, move_str, error)
+        # 'x' exactly when the move takes a pawn
+        if ("x" in move_str) != (board.bits.piece_at(*t) != 0):
+            return GameResult(0, plies, plies, move_str, "wrong capture notation")
+
+        board.move(f, t)
+        plies += 1
+
+    return GameResult(board.winner, plies, None, None, None)
+
+
+def replay_chunk(chunk):
+    # chunk is a list of (line number, game string), replayed in a worker
+    return [(n, replay_game(game_str)) for n, game_str in chunk]
+
+
+def read_games(lines):
+    # (line number, game string) for every non-blank line
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if line:
+            yield n, line
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def replay_stream(lines, workers=1, chunk_size=500):
+    """
+    Replay every game in an iterable of lines, yielding (line number,
+    GameResult) in input order. With several workers, chunks of games are
+    spread over a process pool with a bounded number in flight, so memory
+    stays flat however long the input is.
+    """
+    games = read_games(lines)
+    if workers <= 1:
+        board = Board()
+        for n, game_str in games:
+            board.reset()
+            yield n, replay_game(game_str, board)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in _chunks(games, chunk_size):
+            pending.append(pool.submit(replay_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def result_record(n, result):
+    return {
+        "line": n,
+        "winner": WINNER_NAMES[result.winner],
+        "plies": result.plies,
+        "illegal_ply": result.illegal_ply,
+        "illegal_move": result.illegal_move,
+        "error": result.error,
+    }
+
+
+def main(args):
+    path = args[0] if args else "-"
+    workers = int(args[1]) if len(args) > 1 else os.cpu_count() or 1
+
+    source = sys.stdin if path == "-" else open(path)
+    out = sys.stdout
+    games = invalid = 0
+    start = time.perf_counter()
+    try:
+        for n, result in replay_stream(source, workers):
+            out.write(json.dumps(result_record(n, result)) + "\n")
+            games += 1
+            invalid += result.illegal_ply is not None
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{games} games, {invalid} invalid, {elapsed:.2f} s,"
+        f" {games / elapsed if elapsed else 0:.0f} games/s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
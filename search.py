@@ -0,0 +1,288 @@
+"""
+Negamax alpha-beta search over bitboard positions, with iterative deepening
+under a time budget and a Zobrist hashed transposition table.
+"""
+import time
+from collections import namedtuple
+
+from bitboard import PW, ROW_0, ROW_7, coords, move_targets, move_shifts
+from zobrist import ZOBRIST_WHITE, ZOBRIST_BLACK, ZOBRIST_BLACK_TO_MOVE, zobrist_hash
+
+WIN = 100_000
+INF = WIN + 1
+# scores beyond this are wins/losses at a known distance
+WIN_BOUND = WIN - 1000
+
+EXACT, LOWER, UPPER = 0, 1, 2
+# depth recorded for exactly solved nodes, deeper than any real search
+MAX_DEPTH = 255
+
+ROWS = [0xFF << (8 * y) for y in range(8)]
+# bonus per pawn by how many rows it has advanced from its home row
+ADVANCE = (5, 0, 3, 6, 10, 16, 30, 0)
+WHITE_ADVANCE = [(ROWS[y], ADVANCE[7 - y]) for y in range(8)]
+BLACK_ADVANCE = [(ROWS[y], ADVANCE[y]) for y in range(8)]
+PAWN = 100
+
+SearchResult = namedtuple("SearchResult", "move score depth nodes elapsed pv")
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def evaluate(white, black):
+    """Static score from white's point of view."""
+    score = PAWN * (white.bit_count() - black.bit_count())
+    for row, bonus in WHITE_ADVANCE:
+        if white & row:
+            score += bonus * (white & row).bit_count()
+    for row, bonus in BLACK_ADVANCE:
+        if black & row:
+            score -= bonus * (black & row).bit_count()
+    return score
+
+
+def generate_moves(white, black, side):
+    """
+    Moves for side as (from_sq, to_sq, captures) tuples, ordered captures
+    first and then by how far the destination is advanced.
+    """
+    opp = black if side == PW else white
+    scored = []
+    for mask, shift in zip(move_targets(white, black, side), move_shifts(side)):
+        while mask:
+            low = mask & -mask
+            to = low.bit_length() - 1
+            mask ^= low
+            capture = bool(opp & low)
+            progress = 7 - (to >> 3) if side == PW else to >> 3
+            scored.append((progress + 16 * capture, to - shift, to, capture))
+    scored.sort(reverse=True)
+    return [(fr, to, capture) for _, fr, to, capture in scored]
+
+
+class TranspositionTable:
+    """
+    Fixed size hash table of search results. A slot is overwritten by a
+    deeper or equally deep search of any position, and by anything once
+    its entry is left over from an earlier search.
+    """
+
+    def __init__(self, size=1 << 18):
+        # round down to a power of two so slots are picked by masking
+        self.size = 1 << (size.bit_length() - 1)
+        self.mask = self.size - 1
+        self.entries = [None] * self.size
+        self.generation = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def clear(self):
+        self.entries = [None] * self.size
+
+    def probe(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        slot = key & self.mask
+        old = self.entries[slot]
+        if (
+            old is None
+            or old[0] == key
+            or depth >= old[1]
+            or old[5] != self.generation
+        ):
+            self.entries[slot] = (key, depth, value, flag, move, self.generation)
+
+    def usage(self):
+        return sum(entry is not None for entry in self.entries) / self.size
+
+
+def _to_tt(value, ply):
+    # store wins relative to the node instead of the root
+    if value > WIN_BOUND:
+        return value + ply
+    if value < -WIN_BOUND:
+        return value - ply
+    return value
+
+
+def _from_tt(value, ply):
+    if value > WIN_BOUND:
+        return value - ply
+    if value < -WIN_BOUND:
+        return value + ply
+    return value
+
+
+class Engine:
+    def __init__(self, time_limit=1.0, max_depth=64, tt_size=1 << 18):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.tt = TranspositionTable(tt_size)
+        self.nodes = 0
+        self._deadline = None
+        self._stop = None
+
+    def choose_move(self, board):
+        # best move for the side to move on a board.Board, as grid coordinates
+        result = self.search(board.bits.white, board.bits.black, board.turn)
+        if result.move is None:
+            return None
+        fr, to = result.move
+        return coords(fr), coords(to)
+
+    def search(self, white, black, side, depth=None, time_limit=None,
+               on_iteration=None, stop=None):
+        """
+        Iteratively deepen until depth is reached or the time budget runs
+        out, returning the result of the deepest completed iteration.
+        on_iteration is called with the result of every completed depth,
+        and stop is polled during the search to abandon it early.
+        """
+        if depth is None and time_limit is None:
+            time_limit = self.time_limit
+        if depth is None:
+            depth = self.max_depth
+
+        start = time.perf_counter()
+        self._deadline = start + time_limit if time_limit else None
+        self._stop = stop
+        self.nodes = 0
+        self.tt.new_search()
+
+        key = zobrist_hash(white, black, side)
+        result = SearchResult(None, 0, 0, 0, 0.0, [])
+        for d in range(1, depth + 1):
+            try:
+                score = self._negamax(white, black, side, key, d, -INF, INF, 0)
+            except SearchTimeout:
+                break
+            pv = self._principal_variation(white, black, side, key, d)
+            result = SearchResult(
+                pv[0] if pv else None,
+                score,
+                d,
+                self.nodes,
+                time.perf_counter() - start,
+                pv,
+            )
+            if on_iteration is not None:
+                on_iteration(result)
+            if abs(score) > WIN_BOUND:
+                break
+
+        # always have a move to play, even if the first iteration timed out
+        if result.move is None:
+            moves = generate_moves(white, black, side)
+            if moves:
+                result = result._replace(move=moves[0][:2], pv=[moves[0][:2]])
+        return result._replace(nodes=self.nodes, elapsed=time.perf_counter() - start)
+
+    def _principal_variation(self, white, black, side, key, depth):
+        pv = []
+        for _ in range(depth):
+            entry = self.tt.probe(key)
+            if entry is None or entry[4] is None:
+                break
+            fr, to = entry[4]
+            pv.append((fr, to))
+            white, black, key = _apply(white, black, side, key, fr, to)
+            side = -side
+        return pv
+
+    def _negamax(self, white, black, side, key, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 1023:
+            if self._deadline and time.perf_counter() > self._deadline:
+                raise SearchTimeout()
+            if self._stop is not None and self._stop():
+                raise SearchTimeout()
+
+        # the side that just moved may have reached its last row
+        if side == PW:
+            if black & ROW_7 or not white:
+                return -WIN + ply
+        elif white & ROW_0 or not black:
+            return -WIN + ply
+
+        alpha_orig = alpha
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            _, e_depth, e_value, e_flag, tt_move, _ = entry
+            if e_depth >= depth:
+                value = _from_tt(e_value, ply)
+                if e_flag == EXACT:
+                    return value
+                if e_flag == LOWER and value >= beta:
+                    return value
+                if e_flag == UPPER and value <= alpha:
+                    return value
+
+        moves = generate_moves(white, black, side)
+        if not moves:
+            return -WIN + ply
+
+        # a pawn one step from the last row wins on the spot
+        goal = ROW_0 if side == PW else ROW_7
+        for fr, to, _ in moves:
+            if (1 << to) & goal:
+                value = WIN - ply - 1
+                self.tt.store(key, MAX_DEPTH, _to_tt(value, ply), EXACT, (fr, to))
+                return value
+
+        if depth == 0:
+            score = evaluate(white, black)
+            return score if side == PW else -score
+
+        if tt_move is not None:
+            for i, (fr, to, _) in enumerate(moves):
+                if (fr, to) == tt_move:
+                    moves.insert(0, moves.pop(i))
+                    break
+
+        best = -INF
+        best_move = None
+        for fr, to, _ in moves:
+            w, b, k = _apply(white, black, side, key, fr, to)
+            value = -self._negamax(w, b, -side, k, depth - 1, -beta, -alpha, ply + 1)
+            if value > best:
+                best = value
+                best_move = (fr, to)
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, _to_tt(best, ply), flag, best_move)
+        return best
+
+
+def _apply(white, black, side, key, fr, to):
+    src = 1 << fr
+    dst = 1 << to
+    if side == PW:
+        key ^= ZOBRIST_WHITE[fr] ^ ZOBRIST_WHITE[to] ^ ZOBRIST_BLACK_TO_MOVE
+        if black & dst:
+            key ^= ZOBRIST_BLACK[to]
+            black ^= dst
+        white ^= src | dst
+    else:
+        key ^= ZOBRIST_BLACK[fr] ^ ZOBRIST_BLACK[to] ^ ZOBRIST_BLACK_TO_MOVE
+        if white & dst:
+            key ^= ZOBRIST_WHITE[to]
+            white ^= dst
+        black ^= src | dst
+    return white, black, key
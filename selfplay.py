@@ -0,0 +1,213 @@
+"""
+Self-play training data: games are played by worker processes and every
+position is written to .npz shards of at most shard_size positions with
+
+    planes   (N, 2, 8, 8) uint8   white and black pawns, indexed [x][y]
+    side     (N,) int8            side to move, PW or PB
+    outcome  (N,) int8            1 if the side to move went on to win, -1 if
+                                  it lost, 0 if the game hit MAX_PLIES
+
+    python selfplay.py out_dir games [random|greedy|lookahead] [workers]
+"""
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bitboard import PW, ROW_0, ROW_7, moves, play, winner
+from search import Engine
+
+# longest possible game: every pawn walks the whole board
+MAX_PLIES = 2 * 16 * 7
+
+
+def random_policy(white, black, side, rng):
+    legal = moves(white, black, side)
+    return legal[rng.randrange(len(legal))]
+
+
+def greedy_policy(white, black, side, rng):
+    # win if possible, otherwise capture if possible, otherwise random
+    legal = moves(white, black, side)
+    goal = ROW_0 if side == PW else ROW_7
+    opp = black if side == PW else white
+    wins = [m for m in legal if (1 << m[1]) & goal]
+    if wins:
+        return wins[0]
+    captures = [m for m in legal if (1 << m[1]) & opp]
+    if captures:
+        return captures[rng.randrange(len(captures))]
+    return legal[rng.randrange(len(legal))]
+
+
+class LookaheadPolicy:
+    # a shallow fixed depth alpha-beta search, playing a random move with
+    # probability epsilon so games from the same start do not repeat
+    def __init__(self, depth=2, epsilon=0.1):
+        self.engine = Engine(tt_size=1 << 14)
+        self.depth = depth
+        self.epsilon = epsilon
+
+    def __call__(self, white, black, side, rng):
+        if rng.random() < self.epsilon:
+            return random_policy(white, black, side, rng)
+        return self.engine.search(white, black, side, depth=self.depth).move
+
+
+def make_policy(name):
+    if name == "random":
+        return random_policy
+    if name == "greedy":
+        return greedy_policy
+    if name == "lookahead":
+        return LookaheadPolicy()
+    raise ValueError(f"unknown policy {name!r}")
+
+
+def play_game(policy, rng):
+    # (white masks, black masks, sides) of every position, and the winner
+    white, black = 0xFFFF << 48, 0xFFFF
+    side = PW
+    whites, blacks, sides = [], [], []
+    won = 0
+    while not won and len(sides) < MAX_PLIES:
+        if not moves(white, black, side):
+            won = -side
+            break
+        whites.append(white)
+        blacks.append(black)
+        sides.append(side)
+        fr, to = policy(white, black, side, rng)
+        white, black = play(white, black, side, fr, to)
+        side = -side
+        won = winner(white, black)
+    return whites, blacks, sides, won
+
+
+def play_games(policy_name, games, seed):
+    """
+    Play games in one worker. Positions come back as uint64 masks, 16 bytes
+    each, and are only expanded to planes by the writer.
+    """
+    policy = make_policy(policy_name)
+    rng = random.Random(seed)
+    whites, blacks, sides, outcomes = [], [], [], []
+    for _ in range(games):
+        w, b, s, won = play_game(policy, rng)
+        whites.extend(w)
+        blacks.extend(b)
+        sides.extend(s)
+        outcomes.extend(0 if not won else 1 if side == won else -1 for side in s)
+    return (
+        np.array(whites, dtype=np.uint64),
+        np.array(blacks, dtype=np.uint64),
+        np.array(sides, dtype=np.int8),
+        np.array(outcomes, dtype=np.int8),
+    )
+
+
+def masks_to_planes(masks):
+    # (N,) uint64 -> (N, 8, 8) uint8 indexed [x][y], like BitBoard.to_grid
+    raw = masks.astype("<u8").view(np.uint8).reshape(-1, 8)
+    return np.unpackbits(raw, axis=1, bitorder="little").reshape(-1, 8, 8).transpose(0, 2, 1)
+
+
+class ShardWriter:
+    """Buffer positions and write them out shard_size at a time."""
+
+    def __init__(self, out_dir, shard_size=100_000, compress=True):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.compress = compress
+        self.buffer = []
+        self.buffered = 0
+        self.shards = 0
+        self.positions = 0
+        self.bytes_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, whites, blacks, sides, outcomes):
+        self.buffer.append((whites, blacks, sides, outcomes))
+        self.buffered += len(sides)
+        while self.buffered >= self.shard_size:
+            self.flush(self.shard_size)
+
+    def flush(self, n=None):
+        if not self.buffered:
+            return
+        whites, blacks, sides, outcomes = (np.concatenate(a) for a in zip(*self.buffer))
+        n = len(sides) if n is None else n
+
+        planes = np.stack([masks_to_planes(whites[:n]), masks_to_planes(blacks[:n])], axis=1)
+        path = os.path.join(self.out_dir, f"shard_{self.shards:05d}.npz")
+        save = np.savez_compressed if self.compress else np.savez
+        save(path, planes=planes, side=sides[:n], outcome=outcomes[:n])
+
+        self.shards += 1
+        self.positions += n
+        self.bytes_written += os.path.getsize(path)
+        self.buffer = [(whites[n:], blacks[n:], sides[n:], outcomes[n:])]
+        self.buffered = len(sides) - n
+
+    def close(self):
+        self.flush()
+
+
+def generate(out_dir, games, policy="random", workers=None, games_per_task=50,
+             shard_size=100_000, seed=0, log=print):
+    workers = workers or os.cpu_count() or 1
+    rng = random.Random(seed)
+    tasks = [
+        min(games_per_task, games - start) for start in range(0, games, games_per_task)
+    ]
+
+    start = time.perf_counter()
+    played = 0
+    with ShardWriter(out_dir, shard_size) as writer, ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+
+        def collect():
+            nonlocal played
+            future, count = pending.popleft()
+            writer.add(*future.result())
+            played += count
+            elapsed = time.perf_counter() - start
+            log(
+                f"{played}/{games} games, {writer.positions + writer.buffered} positions,"
+                f" {played / elapsed:.1f} games/s"
+            )
+
+        for count in tasks:
+            future = pool.submit(play_games, policy, count, rng.getrandbits(32))
+            pending.append((future, count))
+            # keep a bounded amount of work in flight so memory stays flat
+            if len(pending) >= 2 * workers:
+                collect()
+        while pending:
+            collect()
+
+    elapsed = time.perf_counter() - start
+    log(
+        f"done: {played} games, {writer.positions} positions in {writer.shards} shards,"
+        f" {played / elapsed:.1f} games/s,"
+        f" {writer.bytes_written / max(writer.positions, 1):.1f} bytes/position"
+    )
+    return writer
+
+
+if __name__ == "__main__":
+    out_dir = sys.argv[1]
+    games = int(sys.argv[2])
+    policy = sys.argv[3] if len(sys.argv) > 3 else "random"
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    generate(out_dir, games, policy, workers)
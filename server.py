@@ -0,0 +1,229 @@
+"""
+Many games at once over TCP: one Board per connection, in a plain line
+protocol, all served by a single asyncio event loop.
+
+    python server.py [port] [engine workers] [engine seconds]
+
+Client lines:
+
+    new                 start over, both sides played by the client
+    play white|black    start over, playing one side against the engine
+    a2-a3 / b7xa6       a move for the side to move
+    undo                take back the last move (the engine's and yours)
+    quit
+
+Every line is answered with one of
+
+    state <ply> <turn> <winner> <last move> <board>
+    error <reason>
+
+where <board> is 64 characters, rank 8 to rank 1 and a to h, 'w' and 'b'
+for pawns and '.' for empty squares. When the engine replies, a second
+state line with its move follows. Engine searches run in a process pool
+so they never block the event loop.
+"""
+import asyncio
+import logging
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import PW, PB, coords
+from board import Board
+from notation import parse_move, format_move
+from search import Engine
+
+log = logging.getLogger(__name__)
+
+SIDE_NAMES = {PW: "white", PB: "black", 0: "none"}
+
+_engine = None
+
+
+def engine_move(white, black, side, time_limit):
+    # runs in a pool worker, which keeps one engine and its table across calls
+    global _engine
+    if _engine is None:
+        _engine = Engine(tt_size=1 << 16)
+    return _engine.search(white, black, side, time_limit=time_limit).move
+
+
+def raise_open_file_limit():
+    # every session is a socket, lift the soft limit as far as allowed
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def board_string(board):
+    cells = []
+    for y in range(8):
+        for x in range(8):
+            piece = board.bits.piece_at(x, y)
+            cells.append("w" if piece == PW else "b" if piece == PB else ".")
+    return "".join(cells)
+
+
+class Session:
+    """One game on one connection."""
+
+    def __init__(self, engine_side=None):
+        self.board = Board()
+        self.engine_side = engine_side
+        self.moves = []
+
+    def state(self):
+        last = self.moves[-1] if self.moves else "-"
+        return (
+            f"state {len(self.moves)} {SIDE_NAMES[self.board.turn]}"
+            f" {SIDE_NAMES[self.board.winner]} {last} {board_string(self.board)}"
+        )
+
+    def move(self, move_str):
+        # apply a move in game string notation, or return why it was refused
+        board = self.board
+        try:
+            f, t = parse_move(move_str)
+        except (ValueError, IndexError):
+            return "unparseable move"
+        x, y = f
+        if not board.in_bounds(x, y) or board.bits.piece_at(x, y) != board.turn:
+            return "not the side to move"
+        if not board.is_legal(f, t):
+            return "game is over" if board.over else "illegal move"
+        capture = board.bits.piece_at(*t) != 0
+        board.move(f, t)
+        self.moves.append(format_move(f, t, capture))
+        return None
+
+    def undo(self):
+        # back to the last position where the client is to move
+        plies = 1 if self.engine_side is None else 2 - (self.board.turn == self.engine_side)
+        for _ in range(min(plies, len(self.moves))):
+            self.board.undo()
+            self.moves.pop()
+
+    def engine_to_move(self):
+        return self.engine_side == self.board.turn and not self.board.over
+
+
+class Server:
+    def __init__(self, workers=None, engine_time=0.1):
+        self.workers = workers
+        self.engine_time = engine_time
+        self.pool = None
+        self.sessions = 0
+        self.peak_sessions = 0
+        self.moves = 0
+
+    def executor(self):
+        # the pool is only started once someone plays the engine
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+        return self.pool
+
+    async def reply_engine(self, session, write):
+        loop = asyncio.get_running_loop()
+        board = session.board
+        move = await loop.run_in_executor(
+            self.executor(), engine_move,
+            board.bits.white, board.bits.black, board.turn, self.engine_time,
+        )
+        if move is None:
+            write("error engine has no move")
+            return
+        fr, to = move
+        session.move(format_move(coords(fr), coords(to)))
+        write(session.state())
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+        self.peak_sessions = max(self.peak_sessions, self.sessions)
+        session = Session()
+
+        def write(line):
+            writer.write(line.encode() + b"\n")
+
+        try:
+            async for raw in reader:
+                line = raw.decode(errors="replace").strip()
+                if not line:
+                    continue
+                command = line.split()
+
+                if command[0] == "quit":
+                    break
+                elif command[0] == "new":
+                    session = Session()
+                    write(session.state())
+                elif command[0] == "play":
+                    if len(command) < 2 or command[1] not in ("white", "black"):
+                        write("error play needs white or black")
+                        continue
+                    session = Session(engine_side=PB if command[1] == "white" else PW)
+                    write(session.state())
+                    if session.engine_to_move():
+                        await self.reply_engine(session, write)
+                elif command[0] == "undo":
+                    session.undo()
+                    write(session.state())
+                    if session.engine_to_move():
+                        await self.reply_engine(session, write)
+                else:
+                    error = session.move(command[0])
+                    if error:
+                        write(f"error {error}")
+                        continue
+                    self.moves += 1
+                    write(session.state())
+                    if session.engine_to_move():
+                        await self.reply_engine(session, write)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def report(self, every):
+        # one log line per interval while the server runs
+        last, start = self.moves, time.perf_counter()
+        while True:
+            await asyncio.sleep(every)
+            now = time.perf_counter()
+            log.info(
+                "%d sessions (peak %d), %.0f moves/s",
+                self.sessions, self.peak_sessions, (self.moves - last) / (now - start),
+            )
+            last, start = self.moves, now
+
+    async def serve(self, host="127.0.0.1", port=8765, report_every=10.0):
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        log.info("listening on %s:%d", host, port)
+        reporter = asyncio.create_task(self.report(report_every))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reporter.cancel()
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    # BREAKTHROUGH_LOG=warning to silence the status lines
+    logging.basicConfig(
+        level=os.environ.get("BREAKTHROUGH_LOG", "info").upper(),
+        format="%(levelname)s %(name)s: %(message)s",
+    )
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    engine_time = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+    raise_open_file_limit()
+    try:
+        asyncio.run(Server(workers, engine_time).serve(port=port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,148 @@
+"""
+Symmetries of Breakthrough positions and canonical Zobrist keys.
+
+Mirroring the files (x -> 7 - x) maps a position onto one with the same
+value, and so does swapping the colours while flipping the rows
+(y -> 7 - y) and handing the move to the other side. Together with both
+at once and the identity that makes four transforms, numbered so that
+bit 0 mirrors and bit 1 swaps. Every transform is its own inverse and
+composing two is their xor.
+
+The canonical key of a position is the smallest of the Zobrist keys of
+its four images, so a table keyed on it stores each class once. Values
+from the side to move's view (search scores, tablebase results) hold for
+every member of a class. A move stored with the canonical key is a move
+of the canonical form, transform_move() maps it back.
+
+SymmetricHash keeps all four keys up to date move by move, the identity
+one is zobrist.zobrist_hash of the position itself.
+"""
+from bitboard import BitBoard, PW, PB, bits
+from zobrist import ZOBRIST_WHITE, ZOBRIST_BLACK, ZOBRIST_BLACK_TO_MOVE
+
+IDENTITY, MIRROR, SWAP, MIRROR_SWAP = 0, 1, 2, 3
+TRANSFORMS = (IDENTITY, MIRROR, SWAP, MIRROR_SWAP)
+NAMES = ("identity", "mirror", "swap", "mirror+swap")
+
+_M1 = 0x5555555555555555
+_M2 = 0x3333333333333333
+_M4 = 0x0F0F0F0F0F0F0F0F
+
+
+def mirror_mask(mask):
+    # reverse the bits of every row byte, x -> 7 - x
+    mask = ((mask >> 1) & _M1) | ((mask & _M1) << 1)
+    mask = ((mask >> 2) & _M2) | ((mask & _M2) << 2)
+    return ((mask >> 4) & _M4) | ((mask & _M4) << 4)
+
+
+def flip_mask(mask):
+    # reverse the row bytes, y -> 7 - y
+    return int.from_bytes(mask.to_bytes(8, "little"), "big")
+
+
+def transform_square(sq, transform):
+    if transform & MIRROR:
+        sq ^= 7
+    if transform & SWAP:
+        sq ^= 56
+    return sq
+
+
+def transform_move(fr, to, transform):
+    return transform_square(fr, transform), transform_square(to, transform)
+
+
+def transform_position(white, black, side, transform):
+    if transform & MIRROR:
+        white, black = mirror_mask(white), mirror_mask(black)
+    if transform & SWAP:
+        white, black, side = flip_mask(black), flip_mask(white), -side
+    return white, black, side
+
+
+def _square_keys():
+    # keys[piece][sq][t]: what a piece of that colour on sq adds to the
+    # Zobrist key of the image under transform t
+    keys = {PW: [], PB: []}
+    for piece in (PW, PB):
+        for sq in range(64):
+            row = []
+            for t in TRANSFORMS:
+                image = ZOBRIST_BLACK if (piece == PB) != bool(t & SWAP) else ZOBRIST_WHITE
+                row.append(image[transform_square(sq, t)])
+            keys[piece].append(tuple(row))
+    return keys
+
+
+SQUARE_KEYS = _square_keys()
+
+
+class SymmetricHash:
+    """
+    Zobrist keys of a position under all four transforms, updated move by
+    move like the counters.
+    """
+
+    __slots__ = ("keys",)
+
+    def __init__(self, keys):
+        self.keys = keys
+
+    @classmethod
+    def from_bits(cls, position, side):
+        # only the swapped images have black to move when white is
+        if side == PW:
+            keys = [0, 0, ZOBRIST_BLACK_TO_MOVE, ZOBRIST_BLACK_TO_MOVE]
+        else:
+            keys = [ZOBRIST_BLACK_TO_MOVE, ZOBRIST_BLACK_TO_MOVE, 0, 0]
+        for piece, mask in ((PW, position.white), (PB, position.black)):
+            square_keys = SQUARE_KEYS[piece]
+            for sq in bits(mask):
+                keys = [h ^ k for h, k in zip(keys, square_keys[sq])]
+        return cls(keys)
+
+    def copy(self):
+        return SymmetricHash(list(self.keys))
+
+    def __eq__(self, other):
+        return isinstance(other, SymmetricHash) and self.keys == other.keys
+
+    @property
+    def key(self):
+        # the plain key, equal to zobrist.zobrist_hash
+        return self.keys[IDENTITY]
+
+    def canonical(self):
+        """(canonical key, transform mapping the position onto its canonical form)"""
+        key = min(self.keys)
+        return key, self.keys.index(key)
+
+    def apply(self, fr, to, mover, captured):
+        # mover moved from fr to to, capturing captured (or 0), and the
+        # side to move changed in every image
+        own = SQUARE_KEYS[mover]
+        a0, a1, a2, a3 = own[fr]
+        b0, b1, b2, b3 = own[to]
+        h0, h1, h2, h3 = self.keys
+        side = ZOBRIST_BLACK_TO_MOVE
+        if captured:
+            c0, c1, c2, c3 = SQUARE_KEYS[captured][to]
+            self.keys = [h0 ^ a0 ^ b0 ^ c0 ^ side, h1 ^ a1 ^ b1 ^ c1 ^ side,
+                         h2 ^ a2 ^ b2 ^ c2 ^ side, h3 ^ a3 ^ b3 ^ c3 ^ side]
+        else:
+            self.keys = [h0 ^ a0 ^ b0 ^ side, h1 ^ a1 ^ b1 ^ side, h2 ^ a2 ^ b2 ^ side, h3 ^ a3 ^ b3 ^ side]
+
+    # xor undoes itself
+    revert = apply
+
+
+def canonical_key(white, black, side):
+    return SymmetricHash.from_bits(BitBoard(white, black), side).canonical()
+
+
+def canonical_position(white, black, side):
+    """(white, black, side, transform) of the canonical form of a position."""
+    _, transform = canonical_key(white, black, side)
+    return (*transform_position(white, black, side, transform), transform)
+
@@ -0,0 +1,255 @@
+"""
+Endgame tablebases for positions with up to K pawns per side.
+
+Pawns only move forward, so every non-capturing move raises the total
+progress of the position (rows advanced, summed over all pawns) by one,
+and every capture drops into a smaller material signature. Positions are
+therefore solved backwards, from the most advanced level down, reading
+already solved levels and smaller signatures: retrograde analysis with
+no cycles to worry about.
+
+One table is written per signature (white pawns, black pawns) as an
+int8 .npy array of shape (2, C(56, nw), C(56, nb)), indexed by side to
+move (0 white, 1 black) and the colex rank of each side's squares. White
+pawns live on squares 8-63 and black pawns on 0-55, since a pawn on its
+last row has already won. Values are from the side to move's view:
+
+    d > 0   wins in d plies
+    d <= 0  loses in -d plies (0: no legal move)
+    INVALID both sides on one square, not a position
+
+    python tablebase.py out_dir [K] [workers]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+from bitboard import PW, PB, bits
+
+INVALID = -128
+SQUARES = 56
+# sort keys for choosing the best move: wins beat losses, faster wins and
+# slower losses are better, no move at all is the worst
+NO_MOVE = -(1 << 20)
+KEY_BASE = 1 << 10
+
+BINOMIAL = np.array([[comb(n, k) for k in range(8)] for n in range(SQUARES + 1)], dtype=np.int64)
+
+
+def table_path(directory, nw, nb):
+    return os.path.join(directory, f"tb_w{nw}_b{nb}.npy")
+
+
+def colex_rank(squares):
+    # rank of a sorted tuple of squares (0-55) among all sets of its size
+    return sum(comb(sq, i + 1) for i, sq in enumerate(squares))
+
+
+def rank_rows(squares):
+    # colex rank of every row of an (M, k) array of squares, sorted first
+    squares = np.sort(squares, axis=1)
+    rank = np.zeros(len(squares), dtype=np.int64)
+    for i in range(squares.shape[1]):
+        rank += BINOMIAL[squares[:, i], i + 1]
+    return rank
+
+
+def placements(k):
+    # (C(56, k), k) array of square sets, row r holds the set of colex rank r
+    sets = np.array(list(combinations(range(SQUARES), k)), dtype=np.int64).reshape(-1, k)
+    ordered = np.empty_like(sets)
+    ordered[rank_rows(sets)] = sets
+    return ordered
+
+
+def move_key(child):
+    # child values are from the opponent's view
+    return np.where(child <= 0, KEY_BASE + child - 1, -KEY_BASE + child + 1)
+
+
+def key_value(key):
+    value = np.where(key > 0, KEY_BASE - key, -(key + KEY_BASE))
+    return np.where(key == NO_MOVE, 0, value)
+
+
+class _Side:
+    """Squares of one side's pawns, in global square numbers."""
+
+    def __init__(self, color, k):
+        self.color = color
+        self.k = k
+        offset = 8 if color == PW else 0
+        self.offset = offset
+        self.sets = placements(k) + offset
+        rows = self.sets >> 3
+        self.progress = (7 - rows if color == PW else rows).sum(axis=1)
+
+    def rank(self, squares):
+        return rank_rows(squares - self.offset)
+
+
+def solve_signature(directory, nw, nb):
+    """Solve one signature, reading the tables it captures into from disk."""
+    start = time.perf_counter()
+    white, black = _Side(PW, nw), _Side(PB, nb)
+    values = np.full((2, len(white.sets), len(black.sets)), INVALID, dtype=np.int8)
+
+    # capture tables: white taking leaves (nw, nb - 1) with black to move,
+    # black taking leaves (nw - 1, nb) with white to move
+    after_white_capture = _load(directory, nw, nb - 1)
+    after_black_capture = _load(directory, nw - 1, nb)
+    white_small = _Side(PW, nw - 1) if nw > 1 else None
+    black_small = _Side(PB, nb - 1) if nb > 1 else None
+
+    overlap = np.zeros((len(white.sets), len(black.sets)), dtype=bool)
+    for i in range(nw):
+        for j in range(nb):
+            overlap |= white.sets[:, i, None] == black.sets[None, :, j]
+    level = white.progress[:, None] + black.progress[None, :]
+    level[overlap] = -1
+
+    for p in range(level.max(), -1, -1):
+        wr, br = np.nonzero(level == p)
+        if not len(wr):
+            continue
+        ws, bs = white.sets[wr], black.sets[br]
+        values[0, wr, br] = _solve_level(
+            ws, bs, white, black, values[1], after_white_capture, black_small, -8
+        )
+        values[1, wr, br] = _solve_level(
+            bs, ws, black, white, values[0].T, after_black_capture, white_small, 8
+        )
+
+    np.save(table_path(directory, nw, nb), values)
+    return nw, nb, values.size, time.perf_counter() - start
+
+
+def _load(directory, nw, nb):
+    if nw == 0 or nb == 0:
+        return None
+    return np.load(table_path(directory, nw, nb), mmap_mode="r")
+
+
+def _solve_level(own, opp, own_side, opp_side, child_values, capture_table, opp_small, forward):
+    """
+    Values for the side owning `own` to move, for M positions given as
+    (M, k) arrays of own and opponent squares. child_values is the
+    opponent-to-move table of this signature indexed [own rank, opp rank].
+    """
+    m = len(own)
+    best = np.full(m, NO_MOVE, dtype=np.int64)
+    goal_row = 0 if own_side.color == PW else 7
+
+    for i in range(own.shape[1]):
+        fr = own[:, i]
+        x = fr & 7
+        for dx in (0, -1, 1):
+            to = fr + forward + dx
+            legal = (x + dx >= 0) & (x + dx <= 7)
+            legal &= ~(own == to[:, None]).any(axis=1)
+            capture = (opp == to[:, None]).any(axis=1)
+            if dx == 0:
+                legal &= ~capture
+            if not legal.any():
+                continue
+
+            key = np.full(m, NO_MOVE, dtype=np.int64)
+            wins = legal & (((to >> 3) == goal_row) | (capture & (opp.shape[1] == 1)))
+            key[wins] = KEY_BASE - 1
+
+            moved = own.copy()
+            moved[:, i] = to
+
+            quiet = legal & ~capture & ~wins
+            if quiet.any():
+                child = child_values[own_side.rank(moved[quiet]), opp_side.rank(opp[quiet])]
+                key[quiet] = move_key(child.astype(np.int64))
+
+            taking = legal & capture & ~wins
+            if taking.any():
+                rest = opp[taking]
+                rest = rest[rest != to[taking, None]].reshape(len(rest), -1)
+                own_rank = own_side.rank(moved[taking])
+                opp_rank = opp_small.rank(rest)
+                if own_side.color == PW:
+                    child = capture_table[1, own_rank, opp_rank]
+                else:
+                    child = capture_table[0, opp_rank, own_rank]
+                key[taking] = move_key(np.asarray(child).astype(np.int64))
+
+            np.maximum(best, key, out=best)
+
+    return key_value(best).astype(np.int8)
+
+
+def signatures(k):
+    # every signature up to k pawns a side, grouped by total material
+    groups = {}
+    for nw in range(1, k + 1):
+        for nb in range(1, k + 1):
+            groups.setdefault(nw + nb, []).append((nw, nb))
+    return [groups[total] for total in sorted(groups)]
+
+
+def generate(directory, k=2, workers=None, log=print):
+    """
+    Solve every signature up to k pawns a side. Signatures with the same
+    total material only depend on smaller ones, so each group is spread
+    over a process pool.
+    """
+    os.makedirs(directory, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        for group in signatures(k):
+            futures = [pool.submit(solve_signature, directory, nw, nb) for nw, nb in group]
+            for future in futures:
+                nw, nb, size, elapsed = future.result()
+                log(f"w{nw} b{nb}: {size} entries in {elapsed:.2f} s")
+    elapsed = time.perf_counter() - start
+    log(f"generated up to {k} pawns a side in {elapsed:.2f} s")
+    return elapsed
+
+
+class Tablebase:
+    """Probe solved tables, memory-mapped on first use."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.tables = {}
+
+    def table(self, nw, nb):
+        if (nw, nb) not in self.tables:
+            path = table_path(self.directory, nw, nb)
+            self.tables[nw, nb] = np.load(path, mmap_mode="r") if os.path.exists(path) else None
+        return self.tables[nw, nb]
+
+    def probe(self, white, black, side):
+        """
+        Value of a position for the side to move (see the module docstring),
+        or None if its signature has no table or the game is already over.
+        """
+        ws = list(bits(white))
+        bs = list(bits(black))
+        if not ws or not bs or ws[0] < 8 or bs[-1] >= SQUARES:
+            return None
+        table = self.table(len(ws), len(bs))
+        if table is None:
+            return None
+        value = table[0 if side == PW else 1, colex_rank([sq - 8 for sq in ws]), colex_rank(bs)]
+        return int(value)
+
+    def probe_board(self, board):
+        return self.probe(board.bits.white, board.bits.black, board.turn)
+
+
+if __name__ == "__main__":
+    directory = sys.argv[1]
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    generate(directory, k, workers)
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from bitboard import BitBoard, PW, PB, coords
+from board import Board
+from zobrist import zobrist_hash
+
+
+def random_move(board, rng):
+    fr, to = rng.choice(board.bits.legal_moves(board.turn))
+    board.move(coords(fr), coords(to))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_consistent_through_every_operation(seed):
+    rng = random.Random(seed)
+    board = Board()
+    for _ in range(400):
+        r = rng.random()
+        if board.over or r < 0.15:
+            board.undo()
+        elif r < 0.25:
+            board.redo()
+        elif r < 0.3:
+            # branch off the main line into an alternate one
+            if board.grid_idx and not board.in_alternate():
+                board.undo()
+                random_move(board, rng)
+        elif r < 0.33:
+            board.seek(rng.randrange(len(board.history) + 1))
+        elif r < 0.35:
+            board.beginning()
+        else:
+            random_move(board, rng)
+        board.check_consistency()
+        white, black, side, _ = board.canonical()
+        assert zobrist_hash(white, black, side) == board.canonical_key()[0]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_undo_winning_move(seed):
+    rng = random.Random(seed)
+    board = Board()
+    while not board.over:
+        random_move(board, rng)
+    won = board.winner
+    assert won in (PW, PB)
+
+    board.undo()
+    board.check_consistency()
+    assert not board.over
+    assert board.winner == 0
+
+    board.redo()
+    board.check_consistency()
+    assert board.over
+    assert board.winner == won
+
+    while board.grid_idx:
+        board.undo()
+        board.check_consistency()
+    assert board.winner == 0
+    board.seek(len(board.history))
+    board.check_consistency()
+    assert board.winner == won
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_from_bits_starts_at_the_position(seed):
+    rng = random.Random(seed)
+    board = Board()
+    for _ in range(rng.randrange(1, 20)):
+        random_move(board, rng)
+    start = BitBoard(board.bits.white, board.bits.black)
+    board = Board.from_bits(start, board.turn)
+    board.check_consistency()
+    turn = board.turn
+    for _ in range(10):
+        if board.over:
+            break
+        random_move(board, rng)
+        board.check_consistency()
+    board.beginning()
+    board.check_consistency()
+    assert board.bits == start
+    assert board.turn == turn
@@ -0,0 +1,32 @@
+import numpy as np
+
+from bench.positions import random_positions
+from evaluation import Evaluator, evaluate_batch, position_keys
+
+
+def stack(positions):
+    grids = np.stack([pos.to_grid() for pos, _ in positions])
+    sides = np.array([side for _, side in positions], dtype=np.int8)
+    return grids, sides
+
+
+def test_repeats_in_a_batch_are_evaluated_once():
+    grids, sides = stack(random_positions(20, seed=1))
+    index = np.random.default_rng(0).integers(0, 20, 200)
+    evaluator = Evaluator(cache_size=100)
+    scores = evaluator.evaluate_many(grids[index], sides[index])
+    assert np.allclose(scores, evaluate_batch(grids[index], sides[index]))
+    unique = len(set(position_keys(grids[index], sides[index])))
+    assert evaluator.misses == unique
+    assert evaluator.hits == 200 - unique
+
+
+def test_lru_order_follows_last_use():
+    grids, sides = stack(random_positions(3, seed=2))
+    evaluator = Evaluator(cache_size=2)
+    # s, o, s: s is the most recently used and must outlive o
+    evaluator.evaluate_many(grids[[0, 1, 0]], sides[[0, 1, 0]])
+    evaluator.evaluate_many(grids[[2]], sides[[2]])
+    keys = position_keys(grids, sides)
+    assert keys[0] in evaluator.cache
+    assert keys[1] not in evaluator.cache
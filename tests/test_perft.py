@@ -0,0 +1,29 @@
+import pytest
+
+from perft import POSITIONS, REFERENCE, board_at, perft
+from replay import replay_game
+
+CASES = [
+    (name, depth, counts[depth - 1])
+    for name, counts in REFERENCE.items()
+    for depth in (1, 2, 3)
+]
+
+
+@pytest.mark.parametrize("backend", ["board", "bits", "batch"])
+@pytest.mark.parametrize("name,depth,expected", CASES)
+def test_reference_counts(backend, name, depth, expected):
+    assert perft(board_at(name), depth, backend) == expected
+
+
+@pytest.mark.parametrize("name", list(POSITIONS))
+def test_positions_are_valid_games(name):
+    assert replay_game(POSITIONS[name]).error is None
+
+
+def test_perft_leaves_board_unchanged():
+    board = board_at("middlegame")
+    before = (board.bits.key(), board.turn, board.grid_idx)
+    perft(board, 3, "board")
+    assert (board.bits.key(), board.turn, board.grid_idx) == before
+    board.check_consistency()
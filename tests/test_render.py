@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+pytest.importorskip("pygame")
+
+import render
+from bench.positions import random_game_strings
+
+
+def test_invalid_games_are_skipped(tmp_path):
+    games = list(enumerate(random_game_strings(3)))
+    games += [(3, "a2-a3;a3-a4;a4-a5"), (4, "garbage"), (5, "a2xa3")]
+    chunks = list(render.render_games("thumbs", games, str(tmp_path), size=64, chunk_size=2))
+    assert sum(images for images, _ in chunks) == 3
+    assert sum(skipped for _, skipped in chunks) == 3
+    assert sorted(os.listdir(tmp_path)) == [f"game_{n:05d}.png" for n in range(3)]
+
+
+def test_frames_cover_every_ply(tmp_path):
+    game_str = random_game_strings(1)[0]
+    [(images, skipped)] = render.render_games("frames", [(0, game_str)], str(tmp_path), size=48)
+    plies = len(game_str.split(";"))
+    assert (images, skipped) == (plies + 1, 0)
+    assert len(os.listdir(tmp_path / "game_00000")) == plies + 1
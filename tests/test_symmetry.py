@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from bitboard import BitBoard, PW
+from symmetry import (
+    SymmetricHash, TRANSFORMS, canonical_key, canonical_position, transform_move,
+    transform_position,
+)
+from zobrist import zobrist_hash
+
+
+def random_games(n, seed):
+    # (position, side, hashes updated move by move) along random games
+    rng = random.Random(seed)
+    for _ in range(n):
+        pos, side = BitBoard(), PW
+        hashes = SymmetricHash.from_bits(pos, side)
+        while not pos.winner():
+            fr, to = rng.choice(pos.legal_moves(side))
+            mover = side
+            captured = pos.make_move(fr, to)
+            hashes.apply(fr, to, mover, captured)
+            side = -side
+            yield pos, side, hashes
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_keys_match_a_rescan(seed):
+    for pos, side, hashes in random_games(20, seed):
+        rescan = [zobrist_hash(*transform_position(pos.white, pos.black, side, t)) for t in TRANSFORMS]
+        assert hashes.keys == rescan
+        assert hashes == SymmetricHash.from_bits(pos, side)
+        assert hashes.key == zobrist_hash(pos.white, pos.black, side)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_revert_undoes_a_whole_game(seed):
+    rng = random.Random(seed)
+    pos, side = BitBoard(), PW
+    hashes = SymmetricHash.from_bits(pos, side)
+    start = hashes.copy()
+    played = []
+    while not pos.winner():
+        fr, to = rng.choice(pos.legal_moves(side))
+        captured = pos.make_move(fr, to)
+        hashes.apply(fr, to, side, captured)
+        played.append((fr, to, side, captured))
+        side = -side
+    for fr, to, mover, captured in reversed(played):
+        pos.unmake_move(fr, to, captured)
+        hashes.revert(fr, to, mover, captured)
+    assert hashes == start
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_images_share_the_canonical_key_and_the_rules(seed):
+    for pos, side, hashes in random_games(10, seed):
+        key = hashes.canonical()[0]
+        for t in TRANSFORMS:
+            white, black, image_side = transform_position(pos.white, pos.black, side, t)
+            assert canonical_key(white, black, image_side)[0] == key
+            # every transform is its own inverse
+            assert transform_position(white, black, image_side, t) == (pos.white, pos.black, side)
+            # the rules commute with every transform
+            image = BitBoard(white, black)
+            moves = sorted(transform_move(fr, to, t) for fr, to in pos.legal_moves(side))
+            assert sorted(image.legal_moves(image_side)) == moves
+
+
+def test_canonical_position_has_the_canonical_key():
+    for pos, side, hashes in random_games(5, 0):
+        white, black, canonical_side, t = canonical_position(pos.white, pos.black, side)
+        key, transform = hashes.canonical()
+        assert t == transform
+        assert zobrist_hash(white, black, canonical_side) == key
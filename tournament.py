@@ -0,0 +1,340 @@
+"""
+Tournaments between move policies, played over a process pool.
+
+    python tournament.py round-robin|gauntlet players [games] [seconds] [workers] [out] [book]
+
+players is a comma separated list of policy names: random, greedy,
+lookahead or search:<seconds per move>, or module:function specs naming
+any other policy. Such a function is called as
+
+    function(white, black, side, rng, clock)
+
+with the white and black bitboards, the side to move (1 white, -1
+black), the game's random.Random and the seconds left on its clock, and
+returns the move as (from square, to square). The module is imported in
+each worker process, so it has to be importable from there. A gauntlet plays the first player
+against every other one, a round robin plays every pair. Each match plays
+pairs of games from the same opening with colours swapped, up to games
+games, and stops early once SPRT decides it. Openings are a few random
+plies, or lines of a book file in game string notation; book lines that
+do not replay as a legal, unfinished game are skipped. Every player gets
+seconds per game and loses when it runs out: search players spend at
+most a share of what is left per move, and a player still thinking when
+its clock hits zero is interrupted. With out, every game is written as
+one game string per line, ready for replay.py.
+"""
+import importlib
+import math
+import os
+import random
+import signal
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+from bitboard import PW, PB, START_WHITE, START_BLACK, square, coords, moves, play, winner
+from notation import parse_move, split_game, format_move
+from replay import replay_game
+from search import Engine
+from selfplay import make_policy
+
+GameRecord = namedtuple("GameRecord", "game_str score reason")
+MatchResult = namedtuple("MatchResult", "player opponent wins losses draws timeouts llr decision elapsed")
+
+OPENING_PLIES = 4
+# moves a player budgets its remaining clock over
+MOVES_TO_GO = 20
+
+
+class PolicyTimeout(Exception):
+    pass
+
+
+class SearchPolicy:
+    # alpha-beta with a time per move, cut down when the clock runs low
+    def __init__(self, time_limit=0.1):
+        self.time_limit = time_limit
+        self.engine = Engine(time_limit=time_limit, tt_size=1 << 16)
+
+    def __call__(self, white, black, side, rng, clock=None):
+        time_limit = self.time_limit
+        if clock is not None:
+            time_limit = min(time_limit, clock / MOVES_TO_GO)
+        return self.engine.search(white, black, side, time_limit=time_limit).move
+
+
+def make_player(spec):
+    """
+    A player policy(white, black, side, rng, clock), clock being the
+    seconds left on its game clock.
+    """
+    name, _, arg = spec.partition(":")
+    if name == "search":
+        return SearchPolicy(float(arg) if arg else 0.1)
+    if arg:
+        # module:function, already taking the clock
+        return getattr(importlib.import_module(name), arg)
+    policy = make_policy(name)
+    return lambda white, black, side, rng, clock: policy(white, black, side, rng)
+
+
+_players = {}
+
+
+def _player(spec):
+    # one instance per worker process, so engines keep their tables
+    if spec not in _players:
+        _players[spec] = make_player(spec)
+    return _players[spec]
+
+
+def random_opening(rng, plies=OPENING_PLIES):
+    white, black, side = START_WHITE, START_BLACK, PW
+    opening = []
+    for _ in range(plies):
+        fr, to = rng.choice(moves(white, black, side))
+        capture = bool((white | black) & (1 << to))
+        opening.append(format_move(coords(fr), coords(to), capture))
+        white, black = play(white, black, side, fr, to)
+        side = -side
+    return opening
+
+
+def read_book(path, log=print):
+    # book lines as move lists, leaving out lines that are not the start
+    # of a legal, unfinished game
+    lines = []
+    rejected = 0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            result = replay_game(line)
+            if result.error or result.winner:
+                rejected += 1
+                continue
+            lines.append(split_game(line))
+    if rejected:
+        log(f"{path}: skipped {rejected} invalid book lines")
+    if not lines:
+        raise ValueError(f"no usable opening in {path}")
+    return lines
+
+
+def _alarm(signum, frame):
+    raise PolicyTimeout
+
+
+def timed_move(policy, white, black, side, rng, clock):
+    """
+    Ask a policy for a move, interrupting it once its clock runs out.
+    Returns None when it did not answer in time.
+    """
+    # SIGALRM only works on the main thread, as in a pool worker
+    if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        return policy(white, black, side, rng, clock)
+    previous = signal.signal(signal.SIGALRM, _alarm)
+    signal.setitimer(signal.ITIMER_REAL, max(clock, 1e-3))
+    try:
+        try:
+            return policy(white, black, side, rng, clock)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    except PolicyTimeout:
+        # also when the alarm beat the timer being cleared
+        return None
+    finally:
+        signal.signal(signal.SIGALRM, previous)
+
+
+def play_game(players, opening, seconds, rng):
+    """
+    One game from an opening, players maps PW and PB to policies. Returns
+    (game string, winner, reason), losing on time, on an illegal move or
+    with no legal move left.
+    """
+    white, black, side = START_WHITE, START_BLACK, PW
+    record = []
+    for move_str in opening:
+        f, t = parse_move(move_str)
+        white, black = play(white, black, side, square(*f), square(*t))
+        record.append(move_str)
+        side = -side
+
+    clocks = {PW: seconds, PB: seconds}
+    while True:
+        won = winner(white, black)
+        if won:
+            return ";".join(record), won, "won"
+        legal = moves(white, black, side)
+        if not legal:
+            return ";".join(record), -side, "no moves"
+
+        start = time.perf_counter()
+        move = timed_move(players[side], white, black, side, rng, clocks[side])
+        clocks[side] -= time.perf_counter() - start
+        if move is None or clocks[side] < 0:
+            return ";".join(record), -side, "time"
+        if move not in legal:
+            return ";".join(record), -side, "illegal move"
+
+        fr, to = move
+        capture = bool((white | black) & (1 << to))
+        record.append(format_move(coords(fr), coords(to), capture))
+        white, black = play(white, black, side, fr, to)
+        side = -side
+
+
+def play_pair(player, opponent, opening, seconds, seed):
+    # both colours from one opening, scored from player's side
+    rng = random.Random(seed)
+    a, b = _player(player), _player(opponent)
+    records = []
+    for colour in (PW, PB):
+        players = {colour: a, -colour: b}
+        game_str, won, reason = play_game(players, opening, seconds, rng)
+        score = 1.0 if won == colour else 0.0 if won else 0.5
+        records.append(GameRecord(game_str, score, reason))
+    return records
+
+
+def elo(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_stats(wins, losses, draws):
+    # games, mean score and per game score variance
+    n = wins + losses + draws
+    mean = (wins + draws / 2) / n
+    var = (wins * (1 - mean) ** 2 + losses * mean ** 2 + draws * (0.5 - mean) ** 2) / n
+    # a perfect score has no variance, count it as half a game off
+    return n, mean, max(var, 0.25 / n)
+
+
+def elo_interval(wins, losses, draws, z=1.96):
+    """Elo difference and its 95% interval from the game scores."""
+    n, mean, var = score_stats(wins, losses, draws)
+    margin = z * math.sqrt(var / n)
+    return elo(mean), elo(mean - margin), elo(mean + margin)
+
+
+def sprt_llr(wins, losses, draws, elo0, elo1):
+    # log likelihood ratio of elo1 against elo0, normal approximation
+    if wins + losses + draws == 0:
+        return 0.0
+    n, mean, var = score_stats(wins, losses, draws)
+    s0 = 1 / (1 + 10 ** (-elo0 / 400))
+    s1 = 1 / (1 + 10 ** (-elo1 / 400))
+    return n * (s1 - s0) * (2 * mean - s0 - s1) / (2 * var)
+
+
+def sprt_bounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def run_match(pool, workers, player, opponent, openings, games, seconds, rng,
+              elo0=0.0, elo1=50.0, alpha=0.05, beta=0.05, out=None):
+    """
+    Play pairs of games until games are played or SPRT accepts a
+    hypothesis: H0 player is elo0 stronger, H1 player is elo1 stronger.
+    """
+    lower, upper = sprt_bounds(alpha, beta)
+    wins = losses = draws = timeouts = 0
+    llr, decision = 0.0, None
+    start = time.perf_counter()
+
+    pending = deque()
+    pairs = (games + 1) // 2
+    submitted = 0
+    while submitted < pairs or pending:
+        # keep a bounded number of pairs in flight
+        while submitted < pairs and len(pending) < 2 * workers and decision is None:
+            opening = openings(rng)
+            pending.append(pool.submit(play_pair, player, opponent, opening, seconds, rng.getrandbits(32)))
+            submitted += 1
+        if not pending:
+            break
+
+        for record in pending.popleft().result():
+            wins += record.score == 1
+            losses += record.score == 0
+            draws += record.score == 0.5
+            timeouts += record.reason == "time"
+            if out is not None:
+                out.write(record.game_str + "\n")
+
+        llr = sprt_llr(wins, losses, draws, elo0, elo1)
+        if decision is None and (llr <= lower or llr >= upper):
+            decision = "H1" if llr >= upper else "H0"
+            # games already running are still counted, nothing new is sent
+            for future in pending:
+                future.cancel()
+            pending = deque(f for f in pending if not f.cancelled())
+
+    return MatchResult(player, opponent, wins, losses, draws, timeouts, llr, decision,
+                       time.perf_counter() - start)
+
+
+def format_result(result):
+    n = result.wins + result.losses + result.draws
+    diff, low, high = (round(e) for e in elo_interval(result.wins, result.losses, result.draws))
+    decision = {"H1": "H1 accepted", "H0": "H0 accepted", None: "undecided"}[result.decision]
+    return (
+        f"{result.player} vs {result.opponent}: +{result.wins} -{result.losses} ={result.draws},"
+        f" elo {diff:+d} [{low:+d}, {high:+d}], LLR {result.llr:.2f} ({decision}),"
+        f" {n} games ({result.timeouts} lost on time), {n / result.elapsed * 60:.0f} games/min"
+    )
+
+
+def pairings(mode, players):
+    if mode == "gauntlet":
+        return [(players[0], other) for other in players[1:]]
+    if mode == "round-robin":
+        return list(combinations(players, 2))
+    raise ValueError(f"unknown mode {mode!r}")
+
+
+def run(mode, players, games=200, seconds=10.0, workers=None, out_path=None,
+        book=None, seed=0, log=print):
+    workers = workers or os.cpu_count() or 1
+    rng = random.Random(seed)
+    if book:
+        lines = read_book(book, log)
+
+        def openings(rng):
+            return rng.choice(lines)
+    else:
+        openings = random_opening
+
+    out = open(out_path, "w") if out_path else None
+    results = []
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            for player, opponent in pairings(mode, players):
+                result = run_match(pool, workers, player, opponent, openings, games, seconds, rng, out=out)
+                results.append(result)
+                log(format_result(result))
+    finally:
+        if out is not None:
+            out.close()
+
+    played = sum(r.wins + r.losses + r.draws for r in results)
+    elapsed = time.perf_counter() - start
+    log(f"{played} games in {elapsed:.1f} s, {played / elapsed * 60:.0f} games/min")
+    return results
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1]
+    players = sys.argv[2].split(",")
+    games = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    seconds = float(sys.argv[4]) if len(sys.argv) > 4 else 10.0
+    workers = int(sys.argv[5]) if len(sys.argv) > 5 else None
+    out_path = sys.argv[6] if len(sys.argv) > 6 else None
+    book = sys.argv[7] if len(sys.argv) > 7 else None
+    run(mode, players, games, seconds, workers, out_path, book)
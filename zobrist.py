@@ -0,0 +1,30 @@
+"""
+Zobrist keys of positions, shared by the search, the symmetric keys in
+symmetry.py and the position index. Keys depend only on the seed, so
+they are stable between runs and written to disk by position_index.py.
+"""
+import random
+
+from bitboard import PB
+
+
+def _zobrist_keys(seed):
+    rng = random.Random(seed)
+    white = [rng.getrandbits(64) for _ in range(64)]
+    black = [rng.getrandbits(64) for _ in range(64)]
+    return white, black, rng.getrandbits(64)
+
+
+ZOBRIST_WHITE, ZOBRIST_BLACK, ZOBRIST_BLACK_TO_MOVE = _zobrist_keys(20230407)
+
+
+def zobrist_hash(white, black, side):
+    # xor of the keys of every pawn, and of the side key with black to move
+    h = ZOBRIST_BLACK_TO_MOVE if side == PB else 0
+    for sq in range(64):
+        bit = 1 << sq
+        if white & bit:
+            h ^= ZOBRIST_WHITE[sq]
+        elif black & bit:
+            h ^= ZOBRIST_BLACK[sq]
+    return h